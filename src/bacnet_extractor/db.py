@@ -1,7 +1,20 @@
 import os, sqlite3
 
-DDL = """
+# Per-connection tuning; WAL + synchronous=NORMAL is durable across app crashes
+PRAGMAS = """
+PRAGMA busy_timeout=5000;
 PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-64000;
+PRAGMA mmap_size=268435456;
+PRAGMA wal_autocheckpoint=1000;
+"""
+
+# Bumped whenever DDL changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 4
+
+DDL = """
 CREATE TABLE IF NOT EXISTS devices (
     device_id      INTEGER PRIMARY KEY,
     address        TEXT NOT NULL,
@@ -12,41 +25,168 @@ CREATE TABLE IF NOT EXISTS devices (
     model_name     TEXT,
     firmware_rev   TEXT,
     app_software   TEXT,
-    last_seen_utc  TEXT NOT NULL
+    last_seen_utc  TEXT NOT NULL,
+    object_count   INTEGER NOT NULL DEFAULT 0  -- maintained by the objects triggers below
 );
 CREATE TABLE IF NOT EXISTS objects (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
     device_id   INTEGER NOT NULL,
     obj_type    TEXT NOT NULL,
     obj_inst    INTEGER NOT NULL,
     obj_name    TEXT,
-    UNIQUE(device_id, obj_type, obj_inst)
-);
+    PRIMARY KEY(device_id, obj_type, obj_inst)
+) WITHOUT ROWID;
 CREATE TABLE IF NOT EXISTS samples (
     ts_utc      TEXT NOT NULL,
     device_id   INTEGER NOT NULL,
     obj_type    TEXT NOT NULL,
     obj_inst    INTEGER NOT NULL,
     property    TEXT NOT NULL,
-    value_raw   TEXT,
+    value_raw   TEXT,     -- non-numeric values only
+    value_num   REAL,     -- numeric values (analog/binary/multistate)
     quality     TEXT,
     msg         TEXT
 );
--- Helpful indices for UI queries
-CREATE INDEX IF NOT EXISTS idx_objects_device_id ON objects(device_id);
+-- Helpful indices for UI queries (objects is clustered on its primary key)
 CREATE INDEX IF NOT EXISTS idx_samples_device_ts ON samples(device_id, ts_utc);
+CREATE INDEX IF NOT EXISTS idx_samples_dev_obj_ts ON samples(device_id, obj_type, obj_inst, ts_utc DESC);
+CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples(ts_utc DESC);
+CREATE TRIGGER IF NOT EXISTS trg_objects_count_ins AFTER INSERT ON objects BEGIN
+    UPDATE devices SET object_count = object_count + 1 WHERE device_id = NEW.device_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_objects_count_del AFTER DELETE ON objects BEGIN
+    UPDATE devices SET object_count = object_count - 1 WHERE device_id = OLD.device_id;
+END;
 """
 
+# Upgrades for databases created by older versions, keyed by the version they produce.
+# Fresh databases get the current DDL directly and skip these. Each one runs inside
+# the transaction that also sets its user_version, so no BEGIN/COMMIT here.
+MIGRATIONS = {
+    2: """
+CREATE TABLE objects_v2 (
+    device_id   INTEGER NOT NULL,
+    obj_type    TEXT NOT NULL,
+    obj_inst    INTEGER NOT NULL,
+    obj_name    TEXT,
+    PRIMARY KEY(device_id, obj_type, obj_inst)
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO objects_v2(device_id, obj_type, obj_inst, obj_name)
+    SELECT device_id, obj_type, obj_inst, obj_name FROM objects;
+DROP TABLE objects;
+ALTER TABLE objects_v2 RENAME TO objects;
+""",
+    3: """
+ALTER TABLE samples ADD COLUMN value_num REAL;
+""",
+    4: """
+ALTER TABLE devices ADD COLUMN object_count INTEGER NOT NULL DEFAULT 0;
+UPDATE devices SET object_count = (SELECT COUNT(*) FROM objects o WHERE o.device_id = devices.device_id);
+""",
+}
+
+
+def numeric_value(value):
+    """value as a float for samples.value_num, or None (booleans and NaN are not numbers here)."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        num = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if num != num else num
+
+
+def number_text(num):
+    """Text shown for a value_num: 3.0 -> "3", else shortest round-trip repr."""
+    if num is None:
+        return None
+    if num.is_integer() and abs(num) < 2 ** 53:
+        return str(int(num))
+    return repr(num)
+
+
+# samples.value as text, whichever column holds it; needs add_sample_functions() on the connection
+SAMPLE_VALUE_SQL = "COALESCE(value_raw, sample_number_text(value_num))"
+
+
+def add_sample_functions(con):
+    """Register the SQL functions used by SAMPLE_VALUE_SQL on con."""
+    con.create_function("sample_number_text", 1, number_text, deterministic=True)
+
+
 def get_db_path():
     return os.getenv("DB_PATH", "data/bacnet_topology.db")
 
 def ensure_db():
     os.makedirs("data", exist_ok=True)
-    con = sqlite3.connect(get_db_path())
-    cur = con.cursor()
-    for stmt in filter(None, DDL.split(";")):
-        s = stmt.strip()
-        if s:
-            cur.execute(s)
-    con.commit()
+    # Autocommit mode: callers group their writes with explicit BEGIN/COMMIT
+    con = sqlite3.connect(get_db_path(), isolation_level=None)
+    con.executescript(PRAGMAS)
+    # Steady-state opens skip schema work once the DB is at the current version
+    if con.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        try:
+            _upgrade_schema(con)
+        except BaseException:
+            con.close()
+            raise
     return con
+
+
+def _statements(script):
+    """Split script into single statements (trigger bodies stay whole) for con.execute()."""
+    stmt = ""
+    for line in script.splitlines(keepends=True):
+        stmt += line
+        if sqlite3.complete_statement(stmt):
+            yield stmt
+            stmt = ""
+
+
+def _upgrade_schema(con):
+    """
+    Apply pending migrations one version per BEGIN IMMEDIATE transaction, each committed
+    together with its user_version; the last step also runs DDL. A failed step rolls back
+    whole, and a concurrent opener re-reads the version under the lock and skips done steps.
+    """
+    while True:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            version = con.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                con.execute("COMMIT")
+                return
+            existing = con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='objects'").fetchone()
+            pending = [v for v in sorted(MIGRATIONS) if v > version] if existing else []
+            target = pending[0] if pending else SCHEMA_VERSION
+            script = MIGRATIONS[target] if pending else ""
+            if target == SCHEMA_VERSION:
+                script += DDL
+            for stmt in _statements(script):
+                con.execute(stmt)
+            con.execute(f"PRAGMA user_version={target}")
+            con.execute("COMMIT")
+        except BaseException:
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+
+
+def begin_bulk_load(con):
+    """
+    Relax journaling for a bulk load into a fresh DB with no concurrent writers.
+    Returns True if applied; pair with end_bulk_load(). Must run outside a transaction.
+    """
+    try:
+        mode = con.execute("PRAGMA journal_mode=MEMORY").fetchone()[0]
+    except sqlite3.Error:
+        return False
+    if str(mode).lower() != "memory":
+        # Another connection holds the WAL open; keep the normal settings
+        return False
+    con.execute("PRAGMA synchronous=OFF")
+    return True
+
+
+def end_bulk_load(con):
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
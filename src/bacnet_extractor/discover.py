@@ -10,17 +10,26 @@ Usage:
 import argparse
 import os
 import asyncio
+import functools
 import inspect
+import re
 import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 from dotenv import load_dotenv
 import BAC0
 
-from .db import ensure_db, get_db_path
+from .db import begin_bulk_load, end_bulk_load, ensure_db, get_db_path, number_text, numeric_value
 
+# Most devices written per transaction during discovery; bounds work lost on a crash
+COMMIT_EVERY_DEVICES = 25
+# Devices queried at the same time during discovery
+DISCOVERY_CONCURRENCY = 8
 
-def upsert_device(cur, info):
+
+def upsert_device(cur, info, ts_iso):
     cur.execute(
         """
         INSERT INTO devices(device_id, address, max_apdu, segmentation, vendor_id, vendor_name,
@@ -47,73 +56,107 @@ def upsert_device(cur, info):
             info.get("model_name"),
             info.get("firmware_rev"),
             info.get("app_software"),
-            datetime.now(timezone.utc).isoformat(),
+            ts_iso,
         ),
     )
 
 
+INSERT_OBJECT_SQL = """
+INSERT OR IGNORE INTO objects(device_id, obj_type, obj_inst, obj_name)
+VALUES(?,?,?,?)
+"""
+
+INSERT_SAMPLE_SQL = """
+INSERT INTO samples(ts_utc, device_id, obj_type, obj_inst, property, value_raw, value_num, quality, msg)
+VALUES(?,?,?,?,?,?,?,?,?)
+"""
+
+
+def sample_row(ts_iso, device_id, obj_type, obj_inst, prop, value_raw, quality=None, msg=None):
+    """Build a parameter tuple for INSERT_SAMPLE_SQL; numeric values are stored in value_num only."""
+    # str values (e.g. "active") are stored as-is without another str() copy
+    text = value_raw if value_raw is None or type(value_raw) is str else str(value_raw)
+    num = numeric_value(value_raw)
+    # Only when number_text() gives back the same text, so exports are unchanged (72.0 stays text)
+    if num is not None and number_text(num) == text:
+        return (ts_iso, device_id, obj_type, obj_inst, prop, None, num, quality, msg)
+    return (ts_iso, device_id, obj_type, obj_inst, prop, text, None, quality, msg)
+
+
 def insert_object(cur, device_id, obj_type, obj_inst, obj_name):
-    cur.execute(
-        """
-        INSERT OR IGNORE INTO objects(device_id, obj_type, obj_inst, obj_name)
-        VALUES(?,?,?,?)
-        """,
-        (device_id, obj_type, obj_inst, obj_name),
-    )
+    # Single-row fallback; bulk paths use executemany(INSERT_OBJECT_SQL, rows)
+    cur.execute(INSERT_OBJECT_SQL, (device_id, obj_type, obj_inst, obj_name))
 
 
 def insert_sample(cur, ts_iso, device_id, obj_type, obj_inst, prop, value_raw, quality=None, msg=None):
-    cur.execute(
-        """
-        INSERT INTO samples(ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg)
-        VALUES(?,?,?,?,?,?,?,?)
-        """,
-        (ts_iso, device_id, obj_type, obj_inst, prop, None if value_raw is None else str(value_raw), quality, msg),
-    )
+    # Single-row fallback; bulk paths use executemany(INSERT_SAMPLE_SQL, rows)
+    cur.execute(INSERT_SAMPLE_SQL, sample_row(ts_iso, device_id, obj_type, obj_inst, prop, value_raw, quality, msg))
+
+
+_NON_DIGITS = re.compile(r"\D+")
 
 
 def normalize_devices(devices):
     out = []
+    seen = set()
     for d in devices:
         if isinstance(d, (list, tuple)) and len(d) >= 2:
-            out.append({"address": str(d[0]), "device_id": int(d[1])})
+            addr = str(d[0]); devid = int(d[1])
         elif isinstance(d, dict):
             addr = d.get("address"); devid = d.get("device_id")
-            if addr is not None and devid is not None:
-                out.append({"address": str(addr), "device_id": int(devid)})
+            if addr is None or devid is None:
+                continue
+            addr = str(addr); devid = int(devid)
         else:
             try:
                 s = str(d)
                 addr = s.split()[-1]
-                digits = "".join(ch for ch in s if ch.isdigit())
-                devid = int(digits) if digits else None
-                if devid is not None:
-                    out.append({"address": addr, "device_id": devid})
+                digits = _NON_DIGITS.sub("", s)
+                if not digits:
+                    continue
+                devid = int(digits)
             except Exception:
-                pass
-    uniq = {}
-    for e in out:
-        uniq[(e["address"], e["device_id"])] = e
-    return list(uniq.values())
+                continue
+        key = (addr, devid)
+        if key not in seen:
+            seen.add(key)
+            out.append({"address": addr, "device_id": devid})
+    return out
+
+
+# Attribute that yielded the object list, per BAC0 device class
+_OBJECT_LIST_ATTR = weakref.WeakKeyDictionary()
+
+
+def _object_list_from(dev, attr):
+    if attr == "properties":
+        return dev.properties("objectList") if hasattr(dev, "properties") else None
+    if hasattr(dev, attr):
+        val = getattr(dev, attr)
+        return val() if callable(val) else val
+    return None
 
 
 def read_object_list(dev):
-    for attr in ("points", "object_list", "objects", "objectList"):
+    cls = type(dev)
+    cached = _OBJECT_LIST_ATTR.get(cls)
+    if cached is not None:
         try:
-            if hasattr(dev, attr):
-                val = getattr(dev, attr)
-                val = val() if callable(val) else val
-                if val:
-                    return val
+            val = _object_list_from(dev, cached)
+            if val:
+                return val
+        except Exception:
+            pass
+    for attr in ("points", "object_list", "objects", "objectList", "properties"):
+        if attr == cached:
+            continue
+        try:
+            val = _object_list_from(dev, attr)
+            if val:
+                _OBJECT_LIST_ATTR[cls] = attr
+                return val
         except Exception:
             pass
-    try:
-        if hasattr(dev, "properties"):
-            raw = dev.properties("objectList")
-            if raw:
-                return raw
-    except Exception:
-        pass
     return []
 
 
@@ -122,18 +165,67 @@ def object_iter(candidates):
         if isinstance(c, (list, tuple)) and len(c) >= 2:
             otype = str(c[0]); inst = int(c[1]); name = None
         elif isinstance(c, dict):
-            otype = str(c.get("type") or c.get("obj_type") or c.get("object_type") or "unknown")
-            inst = int(c.get("instance") or c.get("obj_inst") or c.get("object_instance") or 0)
-            name = c.get("name") or c.get("objectName")
+            get = c.get
+            otype = str(get("type") or get("obj_type") or get("object_type") or "unknown")
+            inst = int(get("instance") or get("obj_inst") or get("object_instance") or 0)
+            name = get("name") or get("objectName")
         else:
             s = str(c)
-            if "," in s:
-                p = s.split(","); otype = p[0].strip(); inst = int(p[1].strip()); name = None
+            otype, sep, rest = s.partition(",")
+            if sep:
+                otype = otype.strip(); inst = int(rest.split(",", 1)[0].strip()); name = None
             else:
                 otype, inst, name = "unknown", 0, None
         yield (otype, inst, name)
 
 
+# Read strategies in probe order: (kind, name)
+_READ_STEPS = (
+    ("dev", "read"), ("dev", "read_property"), ("dev", "readProperty"),  # device-level helper (newer BAC0)
+    ("points", None),  # points mapping (some BAC0 builds expose points dict/attr)
+    ("indexer", None),  # direct indexer
+    ("network", "read"), ("network", "read_multiple"), ("network", "readMultiple"),  # network-level read
+)
+# Winning read strategy per BAC0 device class, so later reads skip the probing
+_READ_STRATEGY = weakref.WeakKeyDictionary()
+_MISS = object()
+
+
+def _item_value(item):
+    for attr in ("presentValue", "value", "pv"):
+        if hasattr(item, attr):
+            v = getattr(item, attr)
+            return v() if callable(v) else v
+    return _MISS
+
+
+def _read_step(step, bacnet, dev, obj_type, obj_inst, prop):
+    """Run one read strategy. Returns (value, msg), or _MISS if it does not apply."""
+    kind, name = step
+    if kind == "dev":
+        m = getattr(dev, name, None)
+        if callable(m):
+            return m((obj_type, obj_inst), prop), name
+    elif kind == "points":
+        pts = getattr(dev, "points", None)
+        pts = pts() if callable(pts) else pts
+        if isinstance(pts, dict):
+            key = f"{obj_type},{obj_inst}"
+            if key in pts:
+                v = _item_value(pts[key])
+                if v is not _MISS:
+                    return v, "points"
+    elif kind == "indexer":
+        v = _item_value(dev[(obj_type, obj_inst)])
+        if v is not _MISS:
+            return v, "indexer"
+    else:
+        m = getattr(bacnet, name, None)
+        if callable(m):
+            return m(address=dev.address, device_id=dev.device_id, obj_id=(obj_type, obj_inst), prop=prop), f"network.{name}"
+    return _MISS
+
+
 def try_read_present_value(bacnet, dev, obj_type, obj_inst):
     """
     Try different patterns to read presentValue, tolerant to BAC0 variants.
@@ -141,68 +233,130 @@ def try_read_present_value(bacnet, dev, obj_type, obj_inst):
     """
     # Common BACnet property name
     prop = "presentValue"
+    last = "no method"
 
-    # 1) Device-level helper (newer BAC0):
-    for meth_name in ("read", "read_property", "readProperty"):
+    cls = type(dev)
+    cached = _READ_STRATEGY.get(cls)
+    if cached is not None:
         try:
-            m = getattr(dev, meth_name, None)
-            if callable(m):
-                v = m((obj_type, obj_inst), prop)
-                return v, f"{meth_name}"
+            res = _read_step(cached, bacnet, dev, obj_type, obj_inst, prop)
+            if res is not _MISS:
+                return res
         except Exception as e:
             last = str(e)
 
-    # 2) Points mapping (some BAC0 builds expose points dict/attr)
-    try:
-        pts = getattr(dev, "points", None)
-        pts = pts() if callable(pts) else pts
-        if isinstance(pts, dict):
-            key = f"{obj_type},{obj_inst}"
-            if key in pts:
-                p = pts[key]
-                for attr in ("presentValue", "value", "pv"):
-                    if hasattr(p, attr):
-                        v = getattr(p, attr)
-                        v = v() if callable(v) else v
-                        return v, "points"
-    except Exception as e:
-        last = str(e)
-
-    # 3) Direct indexer
-    try:
-        item = dev[(obj_type, obj_inst)]
-        for attr in ("presentValue", "value", "pv"):
-            if hasattr(item, attr):
-                v = getattr(item, attr)
-                v = v() if callable(v) else v
-                return v, "indexer"
-    except Exception as e:
-        last = str(e)
-
-    # 4) Network-level read if exposed
-    for meth_name in ("read", "read_multiple", "readMultiple"):
+    for step in _READ_STEPS:
+        if step == cached:
+            continue
         try:
-            m = getattr(bacnet, meth_name, None)
-            if callable(m):
-                v = m(address=dev.address, device_id=dev.device_id, obj_id=(obj_type, obj_inst), prop=prop)
-                return v, f"network.{meth_name}"
+            res = _read_step(step, bacnet, dev, obj_type, obj_inst, prop)
         except Exception as e:
             last = str(e)
+            continue
+        if res is not _MISS:
+            _READ_STRATEGY[cls] = step
+            return res
+
+    return None, f"unreadable: {last}"
+
+
+def device_info(dev, devid, addr):
+    """Collect the devices-table row from a BAC0 device helper."""
+    return {
+        "device_id": devid,
+        "address": addr,
+        "max_apdu": getattr(dev, "max_apdu", None),
+        "segmentation": getattr(dev, "segmentation", None),
+        "vendor_id": getattr(dev, "vendor_id", None),
+        "vendor_name": getattr(dev, "vendor_name", None),
+        "model_name": getattr(dev, "model_name", None),
+        "firmware_rev": getattr(dev, "firmware_revision", None),
+        "app_software": getattr(dev, "application_software_version", None),
+    }
+
+
+# Only common value-carrying types are snapshotted to keep the snapshot fast
+_SNAPSHOT_TYPES = frozenset({
+    "analogInput", "analogOutput", "analogValue",
+    "binaryInput", "binaryOutput", "binaryValue",
+    "multiStateInput", "multiStateOutput", "multiStateValue",
+})
+
+
+def snapshot_rows(bacnet, dev, addr, devid, obj_rows, ts_iso):
+    """Read presentValue for the value-carrying objects in obj_rows; returns sample rows."""
+    sample_rows = []
+    snap_objs = [(otype, inst) for (_, otype, inst, _name) in obj_rows if otype in _SNAPSHOT_TYPES]
+    for start in range(0, len(snap_objs), READ_MULTIPLE_CHUNK):
+        chunk = snap_objs[start:start + READ_MULTIPLE_CHUNK]
+        # One ReadPropertyMultiple per chunk; fall back to single reads if unsupported
+        values, msg = try_read_multiple(bacnet, addr, [(otype, inst, "presentValue") for (otype, inst) in chunk])
+        if values is not None:
+            for (otype, inst), v in zip(chunk, values):
+                sample_rows.append(sample_row(ts_iso, devid, otype, inst, "presentValue", v, quality="snapshot", msg=msg))
+            continue
+        for (otype, inst) in chunk:
+            try:
+                v, msg = try_read_present_value(bacnet, dev, otype, inst)
+                sample_rows.append(sample_row(ts_iso, devid, otype, inst, "presentValue", v, quality="snapshot", msg=msg))
+            except Exception as e:
+                # Best effort: record an error sample and continue
+                sample_rows.append(sample_row(ts_iso, devid, otype, inst, "presentValue", None, quality="snapshot", msg=f"error: {e}"))
+    return sample_rows
 
-    return None, f"unreadable: {last if 'last' in locals() else 'no method'}"
+
+# Objects per ReadPropertyMultiple request; keeps requests within typical max APDU sizes
+READ_MULTIPLE_CHUNK = 20
+
+
+def try_read_multiple(bacnet, address, obj_props):
+    """
+    Read several (obj_type, obj_inst, prop) in one ReadPropertyMultiple request.
+    Returns (values, msg) with values aligned to obj_props, or (None, msg) when
+    the stack has no usable readMultiple or the reply does not line up.
+    """
+    request = " ".join([str(address)] + [f"{t} {i} {p}" for (t, i, p) in obj_props])
+    last = "no method"
+    for meth_name in ("readMultiple", "read_multiple"):
+        try:
+            m = getattr(bacnet, meth_name, None)
+            if not callable(m):
+                continue
+            res = m(request)
+            if inspect.isawaitable(res):
+                # Async-only stacks are handled by the per-object fallback
+                close = getattr(res, "close", None)
+                if callable(close):
+                    close()
+                last = "awaitable"
+                continue
+            if isinstance(res, (list, tuple)) and len(res) == len(obj_props):
+                return list(res), f"network.{meth_name}"
+            last = "unexpected reply"
+        except Exception as e:
+            last = str(e)
+    return None, f"read_multiple unavailable: {last}"
 
 
-async def discover_devices(bacnet):
+async def discover_devices(bacnet, executor=None):
     """
     Try multiple BAC0 discovery entry points to be compatible across versions.
-    Returns (devices, method_name)
+    Returns (devices, method_name). Blocking entry points run on ``executor``.
     """
+    loop = asyncio.get_running_loop()
+
+    def call(fn, *args):
+        # Coroutine functions are awaited on the loop; plain ones block, so go to a thread
+        if inspect.iscoroutinefunction(fn):
+            return fn(*args)
+        return loop.run_in_executor(executor, fn, *args)
+
     # 1) Methods on the network object
     for meth in ("whois", "who_is", "whoIs", "discover", "scan"):
         try:
             m = getattr(bacnet, meth, None)
             if callable(m):
-                res = m()
+                res = await call(m)
                 if inspect.isawaitable(res):
                     res = await res
                 if res is not None:
@@ -213,7 +367,7 @@ async def discover_devices(bacnet):
     # 2) Module-level helper
     try:
         if hasattr(BAC0, "discover") and callable(BAC0.discover):
-            res = BAC0.discover(bacnet)
+            res = await call(BAC0.discover, bacnet)
             if inspect.isawaitable(res):
                 res = await res
             if res is not None:
@@ -232,12 +386,46 @@ async def discover_devices(bacnet):
     return [], "none"
 
 
-async def async_main(local_if: str | None, sleep_between: float, local_port: int | None, snapshot: bool, progress=None, is_cancelled=None):
+async def async_main(local_if: str | None, sleep_between: float, local_port: int | None, snapshot: bool, progress=None, is_cancelled=None, register_cancel=None):
+    """
+    Discover devices and store them. ``register_cancel``, if given, is called with a
+    thread-safe ``trip()`` that wakes the inter-device delay immediately on cancel.
+    """
     try:
         BAC0.log_level("error")
     except Exception:
         pass
 
+    loop = asyncio.get_running_loop()
+    cancel_ev = asyncio.Event()
+
+    def trip():
+        try:
+            loop.call_soon_threadsafe(cancel_ev.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    if register_cancel:
+        try:
+            register_cancel(trip)
+        except Exception:
+            pass
+
+    def _cancelled():
+        return cancel_ev.is_set() or bool(is_cancelled and callable(is_cancelled) and is_cancelled())
+
+    # Own threads instead of the loop's shared default executor, which the poller also uses
+    # on the web app's loop: BAC0 calls get DISCOVERY_CONCURRENCY workers, and SQLite gets a
+    # single thread so its connection stays on one thread and commits never block the loop
+    pool = ThreadPoolExecutor(max_workers=DISCOVERY_CONCURRENCY, thread_name_prefix="discovery")
+    db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="discovery-db")
+
+    def blocking(fn, *args, **kwargs):
+        return loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    def in_db(fn, *args):
+        return loop.run_in_executor(db_pool, functools.partial(fn, *args))
+
     # Start BACnet stack with optional custom port and fallback if busy
     async def _create_bacnet_with_fallback():
         tried = []
@@ -255,9 +443,9 @@ async def async_main(local_if: str | None, sleep_between: float, local_port: int
             try:
                 tried.append(p)
                 if local_if is not None:
-                    bn = BAC0.lite(local_if, port=p)
+                    bn = await blocking(BAC0.lite, local_if, port=p)
                 else:
-                    bn = BAC0.lite(port=p)
+                    bn = await blocking(BAC0.lite, port=p)
                 if progress:
                     try:
                         progress({"event": "port_selected", "port": p, "tried": tried[:]})
@@ -277,9 +465,15 @@ async def async_main(local_if: str | None, sleep_between: float, local_port: int
             raise last_exc
         raise RuntimeError("Unable to create BACnet stack: no ports available")
 
-    bacnet = await _create_bacnet_with_fallback()
+    try:
+        bacnet = await _create_bacnet_with_fallback()
+    except BaseException:
+        pool.shutdown(wait=False)
+        db_pool.shutdown(wait=False)
+        raise
 
     con = None
+    bulk = False
     try:
         if progress:
             try:
@@ -287,7 +481,7 @@ async def async_main(local_if: str | None, sleep_between: float, local_port: int
             except Exception:
                 pass
         print("[i] Broadcasting Who-Is / Discover")
-        raw, method = await discover_devices(bacnet)
+        raw, method = await discover_devices(bacnet, pool)
         devices = normalize_devices(raw)
         print(f"[i] Found {len(devices)} device(s).")
         if progress:
@@ -296,138 +490,216 @@ async def async_main(local_if: str | None, sleep_between: float, local_port: int
             except Exception:
                 pass
 
-        con = ensure_db()
-        cur = con.cursor()
+        con = await in_db(ensure_db)
+        cur = await in_db(con.cursor)
+        # Discovery-run timestamp stamped on every device row as last_seen_utc
+        run_ts = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+        # First snapshot into an empty DB is a pure bulk load: skip WAL/fsync until done
+        def start_bulk_load():
+            return con.execute("SELECT 1 FROM samples LIMIT 1").fetchone() is None and begin_bulk_load(con)
+
+        if snapshot:
+            try:
+                bulk = await in_db(start_bulk_load)
+            except Exception:
+                pass
 
-        for entry in devices:
-            if is_cancelled and callable(is_cancelled) and is_cancelled():
+        # Single writer keeps SQLite access on one coroutine (and db_pool's one thread)
+        # while devices are queried concurrently
+        writes = asyncio.Queue()
+
+        def write(kind, payload):
+            # Take the write lock only once there is something to write
+            if not con.in_transaction:
+                cur.execute("BEGIN IMMEDIATE")
+            if kind == "device":
+                upsert_device(cur, payload, run_ts)
+            elif kind == "objects":
+                cur.executemany(INSERT_OBJECT_SQL, payload)
+            elif kind == "samples":
+                cur.executemany(INSERT_SAMPLE_SQL, payload)
+
+        def commit():
+            if not con.in_transaction:
+                return
+            try:
+                cur.execute("COMMIT")
+            except Exception as e:
+                print(f"      ! commit failed: {e}")
+                if con.in_transaction:
+                    cur.execute("ROLLBACK")
+
+        async def writer():
+            done = 0
+            while True:
+                item = await writes.get()
+                if item is None:
+                    break
+                kind, payload = item
+                if kind == "done":
+                    done += 1
+                else:
+                    try:
+                        await in_db(write, kind, payload)
+                    except Exception as e:
+                        print(f"      ! {kind} insert failed: {e}")
+                # Commit as soon as the queue drains (the next write is waiting on BACnet reads)
+                # and every COMMIT_EVERY_DEVICES devices under a steady stream, so the lock is
+                # never held across network I/O and the poller can write in between
+                if writes.empty() or (kind == "done" and done % COMMIT_EVERY_DEVICES == 0):
+                    await in_db(commit)
+            await in_db(commit)
+
+        sem = asyncio.Semaphore(DISCOVERY_CONCURRENCY)
+
+        async def process_device(entry):
+            async with sem:
+                if _cancelled():
+                    return
+                addr = entry["address"]; devid = entry["device_id"]
+                print(f"    + Device {devid} @ {addr}")
                 if progress:
                     try:
-                        progress({"event": "cancelled"})
+                        progress({"event": "device_start", "device_id": devid, "address": addr})
                     except Exception:
                         pass
-                break
-            addr = entry["address"]; devid = entry["device_id"]
-            print(f"    + Device {devid} @ {addr}")
-            if progress:
+                # BAC0 calls block, so run them off the event loop
                 try:
-                    progress({"event": "device_start", "device_id": devid, "address": addr})
-                except Exception:
-                    pass
-            try:
-                dev = BAC0.device(address=addr, device_id=devid, network=bacnet)
-            except Exception as e:
-                print(f"      ! Cannot create device helper: {e}")
+                    dev = await blocking(BAC0.device, address=addr, device_id=devid, network=bacnet)
+                except Exception as e:
+                    print(f"      ! Cannot create device helper: {e}")
+                    if progress:
+                        try:
+                            progress({"event": "device_error", "device_id": devid, "address": addr, "error": str(e)})
+                        except Exception:
+                            pass
+                    return
+
+                info = await blocking(device_info, dev, devid, addr)
+                await writes.put(("device", info))
+
+                # Object list
+                try:
+                    cand = await blocking(read_object_list, dev)
+                except Exception as e:
+                    print(f"      ! objectList read failed: {e}")
+                    cand = []
+
+                # Save objects (one executemany per device instead of N single-row inserts)
+                obj_rows = [(devid, otype, inst, name) for (otype, inst, name) in object_iter(cand)]
+                obj_count = len(obj_rows)
+                if obj_rows:
+                    await writes.put(("objects", obj_rows))
+                print(f"      Saved {obj_count} object(s) for device {devid}.")
                 if progress:
                     try:
-                        progress({"event": "device_error", "device_id": devid, "address": addr, "error": str(e)})
+                        progress({"event": "device_objects", "device_id": devid, "count": obj_count})
                     except Exception:
                         pass
-                continue
 
-            info = {
-                "device_id": devid,
-                "address": addr,
-                "max_apdu": getattr(dev, "max_apdu", None),
-                "segmentation": getattr(dev, "segmentation", None),
-                "vendor_id": getattr(dev, "vendor_id", None),
-                "vendor_name": getattr(dev, "vendor_name", None),
-                "model_name": getattr(dev, "model_name", None),
-                "firmware_rev": getattr(dev, "firmware_revision", None),
-                "app_software": getattr(dev, "application_software_version", None),
-            }
-            upsert_device(cur, info)
-
-            # Object list
-            try:
-                cand = read_object_list(dev)
-            except Exception as e:
-                print(f"      ! objectList read failed: {e}")
-                cand = []
-
-            # Save objects
-            obj_count = 0
-            for (otype, inst, name) in object_iter(cand):
-                insert_object(cur, devid, otype, inst, name)
-                obj_count += 1
-            con.commit()
-            print(f"      Saved {obj_count} object(s).")
-            if progress:
-                try:
-                    progress({"event": "device_objects", "device_id": devid, "count": obj_count})
-                except Exception:
-                    pass
+                # Optional: snapshot presentValue
+                if snapshot and obj_count:
+                    ts_iso = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+                    sample_rows = await blocking(snapshot_rows, bacnet, dev, addr, devid, obj_rows, ts_iso)
+                    if sample_rows:
+                        await writes.put(("samples", sample_rows))
+                    print(f"      Snapshot saved for {len(sample_rows)} object(s) of device {devid}.")
+                    if progress:
+                        try:
+                            progress({"event": "device_snapshot", "device_id": devid, "count": len(sample_rows)})
+                        except Exception:
+                            pass
+
+                await writes.put(("done", devid))
 
-            # Optional: snapshot presentValue
-            if snapshot and obj_count:
-                ts_iso = datetime.now(timezone.utc).isoformat()
-                snap_count = 0
-                for (otype, inst, name) in object_iter(cand):
-                    # Only common value-carrying types to keep the snapshot fast
-                    if otype not in ("analogInput", "analogOutput", "analogValue",
-                                     "binaryInput", "binaryOutput", "binaryValue",
-                                     "multiStateInput", "multiStateOutput", "multiStateValue"):
-                        continue
+                # Delay, but wake immediately if cancelled
+                if sleep_between > 0 and not _cancelled():
                     try:
-                        v, msg = try_read_present_value(bacnet, dev, otype, inst)
-                        insert_sample(cur, ts_iso, devid, otype, inst, "presentValue", v, quality="snapshot", msg=msg)
-                        snap_count += 1
-                    except Exception as e:
-                        # Best effort: record an error sample or at least continue
-                        try:
-                            insert_sample(cur, ts_iso, devid, otype, inst, "presentValue", None, quality="snapshot", msg=f"error: {e}")
-                            snap_count += 1
-                        except Exception as e2:
-                            print(f"      ! snapshot insert failed: {e2}")
-                con.commit()
-                print(f"      Snapshot saved for {snap_count} object(s).")
+                        await asyncio.wait_for(cancel_ev.wait(), timeout=sleep_between)
+                    except asyncio.TimeoutError:
+                        pass
                 if progress:
                     try:
-                        progress({"event": "device_snapshot", "device_id": devid, "count": snap_count})
+                        progress({"event": "device_done", "device_id": devid})
                     except Exception:
                         pass
 
-            # Delay, but bail quickly if cancelled
-            for _ in range(int(max(1, sleep_between / 0.05))):
-                if is_cancelled and callable(is_cancelled) and is_cancelled():
-                    break
-                await asyncio.sleep(min(0.05, max(0.0, sleep_between)))
-            if progress:
-                try:
-                    progress({"event": "device_done", "device_id": devid})
-                except Exception:
-                    pass
+        async def guarded(entry):
+            # One failing device must not abort the others
+            try:
+                await process_device(entry)
+            except Exception as e:
+                print(f"      ! Device {entry['device_id']} failed: {e}")
+                if progress:
+                    try:
+                        progress({"event": "device_error", "device_id": entry["device_id"], "address": entry["address"], "error": str(e)})
+                    except Exception:
+                        pass
 
-        print(f"[i] Discovery complete. DB at: {get_db_path()}")
-        if progress:
+        writer_task = asyncio.create_task(writer())
+        try:
+            await asyncio.gather(*(guarded(e) for e in devices))
+        finally:
+            await writes.put(None)
+            await writer_task
+        if _cancelled() and progress:
             try:
-                progress({"event": "complete", "db_path": get_db_path()})
+                progress({"event": "cancelled"})
             except Exception:
                 pass
-    finally:
+
+        # Refresh planner statistics after the bulk load
         try:
-            if con is not None:
-                con.close()
+            await in_db(cur.execute, "ANALYZE")
         except Exception:
             pass
-        # Graceful BACnet shutdown (best effort across BAC0 variants)
-        for meth in ("disconnect", "close", "stop", "shutdown"):
+        print(f"[i] Discovery complete. DB at: {get_db_path()}")
+        if progress:
             try:
-                m = getattr(bacnet, meth, None)
-                if callable(m):
-                    m()
-                    break
+                progress({"event": "complete", "db_path": get_db_path()})
             except Exception:
                 pass
-        # Extra best-effort cleanup for some BAC0 builds
-        try:
-            if hasattr(bacnet, "__del__"):
+    finally:
+        def close_db():
+            # Keep whatever was written before a cancel/error
+            if con.in_transaction:
+                con.execute("COMMIT")
+            if bulk:
+                end_bulk_load(con)
+            con.close()
+
+        def release_bacnet():
+            # Graceful BACnet shutdown (best effort across BAC0 variants)
+            for meth in ("disconnect", "close", "stop", "shutdown"):
                 try:
-                    bacnet.__del__()
+                    m = getattr(bacnet, meth, None)
+                    if callable(m):
+                        m()
+                        break
                 except Exception:
                     pass
+            # Extra best-effort cleanup for some BAC0 builds
+            try:
+                if hasattr(bacnet, "__del__"):
+                    try:
+                        bacnet.__del__()
+                    except Exception:
+                        pass
+            except Exception:
+                pass
+
+        try:
+            if con is not None:
+                await in_db(close_db)
+        except Exception:
+            pass
+        try:
+            await blocking(release_bacnet)
         except Exception:
             pass
+        pool.shutdown(wait=False)
+        db_pool.shutdown(wait=False)
         # Small delay to let OS release socket
         try:
             await asyncio.sleep(0.2)
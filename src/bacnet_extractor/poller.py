@@ -1,14 +1,17 @@
 import os
 import csv
+import asyncio
+import queue
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 import BAC0
 
 from .db import ensure_db
-from .discover import try_read_present_value
+from .discover import INSERT_SAMPLE_SQL, READ_MULTIPLE_CHUNK, sample_row, try_read_multiple, try_read_present_value
 
 
 def _create_bacnet_with_fallback(local_if: str | None, local_port: int | None, progress=None):
@@ -64,61 +67,281 @@ def _safe_release_bacnet(bacnet):
         pass
 
 
+def _release_devices(devices):
+    # Best-effort disconnect of per-cycle device helpers
+    for dev in devices:
+        try:
+            m = getattr(dev, "disconnect", None)
+            if callable(m):
+                m()
+        except Exception:
+            pass
+
+
+# Accepted header names per map field (matched case-insensitively), in priority order
+_MAP_COLUMNS = {
+    'device_id': ('device_id', 'deviceid', 'device'),
+    'address': ('address',),
+    'obj_type': ('obj_type', 'object_type', 'type'),
+    'obj_inst': ('obj_inst', 'object_instance', 'instance'),
+    'property': ('property', 'prop'),
+    'tag': ('tag', 'name'),
+}
+
+
+def _pick(row, idxs):
+    # First non-empty value among the candidate columns
+    for i in idxs:
+        if i < len(row) and row[i]:
+            return row[i]
+    return None
+
+
 def _read_map_csv(path: str):
     entries = []
     with open(path, newline='', encoding='utf-8') as f:
-        r = csv.DictReader(f)
+        r = csv.reader(f)
+        header = next(r, None)
+        if not header:
+            return entries
+        # Resolve column positions once from the header
+        header = [h.strip().lstrip('\ufeff').lower() for h in header]
+        idx = {field: [header.index(n) for n in names if n in header] for field, names in _MAP_COLUMNS.items()}
+        i_dev, i_addr, i_type, i_inst, i_prop, i_tag = (
+            idx['device_id'], idx['address'], idx['obj_type'], idx['obj_inst'], idx['property'], idx['tag'])
         for row in r:
             if not row:
                 continue
-            # Normalize keys
-            device_id = row.get('device_id') or row.get('DeviceId') or row.get('device')
-            address = row.get('address') or row.get('Address')
-            obj_type = row.get('obj_type') or row.get('object_type') or row.get('type')
-            obj_inst = row.get('obj_inst') or row.get('object_instance') or row.get('instance')
-            prop = row.get('property') or row.get('prop') or 'presentValue'
-            tag = row.get('tag') or row.get('name') or None
+            device_id = _pick(row, i_dev)
+            address = _pick(row, i_addr)
+            obj_type = _pick(row, i_type)
+            obj_inst = _pick(row, i_inst)
+            prop = _pick(row, i_prop) or 'presentValue'
+            tag = _pick(row, i_tag)
             if not obj_type or not obj_inst:
                 continue
             try:
-                obj_inst = int(str(obj_inst).strip())
+                obj_inst = int(obj_inst.strip())
             except Exception:
                 continue
             devid_int = None
             if device_id:
                 try:
-                    devid_int = int(str(device_id).strip())
+                    devid_int = int(device_id.strip())
                 except Exception:
                     pass
             entries.append({
                 'device_id': devid_int,
-                'address': (str(address).strip() if address else None),
-                'obj_type': str(obj_type).strip(),
+                'address': (address.strip() if address else None),
+                'obj_type': obj_type.strip(),
                 'obj_inst': obj_inst,
-                'property': str(prop).strip() if prop else 'presentValue',
-                'tag': (str(tag).strip() if tag else None),
+                'property': prop.strip() if prop else 'presentValue',
+                'tag': (tag.strip() if tag else None),
             })
     return entries
 
 
-def _resolve_address(cur, device_id: int):
-    cur.execute("SELECT address FROM devices WHERE device_id=?", (device_id,))
-    r = cur.fetchone()
-    return r[0] if r else None
+# Parsed extraction maps keyed by path -> (mtime_ns, size, entries)
+_MAP_CACHE = {}
+
+
+def _load_map(path: str):
+    """Return parsed map entries, re-reading the CSV only when the file changes."""
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    cached = _MAP_CACHE.get(path)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    entries = _read_map_csv(path)
+    _MAP_CACHE[path] = (sig, entries)
+    return entries
+
+
+DEVICE_ADDRESSES_SQL = "SELECT device_id, address FROM devices"
+
+
+def _read_point(bn, dev, addr, devid, e):
+    """Single-point read for one map entry. Returns (value, msg); raises on read errors."""
+    if (e['property'] or 'presentValue') == 'presentValue':
+        return try_read_present_value(bn, dev, e['obj_type'], e['obj_inst'])
+    # generic property read attempts
+    for meth in ("read", "read_property", "readProperty"):
+        try:
+            m = getattr(dev, meth, None)
+            if callable(m):
+                return m((e['obj_type'], e['obj_inst']), e['property']), meth
+        except Exception:
+            pass
+    for meth in ("read", "read_multiple", "readMultiple"):
+        try:
+            m = getattr(bn, meth, None)
+            if callable(m):
+                return m(address=addr, device_id=devid, obj_id=(e['obj_type'], e['obj_inst']), prop=e['property']), f"network.{meth}"
+        except Exception:
+            pass
+    return None, "unreadable"
+
+
+# Writer thread commits once this many rows are pending or the oldest has waited this long
+WRITER_BATCH_ROWS = 100
+WRITER_FLUSH_SEC = 0.25
+# After a failed commit (e.g. SQLITE_BUSY while discovery writes) rows are kept and retried;
+# beyond this many the oldest are dropped so a broken DB cannot grow memory without bound
+WRITER_RETRY_SEC = 2.0
+WRITER_MAX_PENDING = 50000
+
+
+def _writer_loop(q: queue.Queue):
+    """
+    Drain sample rows from q into SQLite on a dedicated connection, so BACnet reads
+    never wait on a commit. Messages: ("rows", list), ("sync", (event, box)), None to stop.
+    """
+    pending = []
+    deadline = None
+    error = None
+    failing = False
+    try:
+        con = ensure_db()
+    except Exception as e:
+        # Keep draining so sync() callers are answered instead of blocking forever;
+        # flush() retries the open
+        con = None
+        print(f"      ! Poll writer cannot open DB: {e}")
+
+    def flush():
+        nonlocal con, error, deadline, failing
+        deadline = None
+        if not pending:
+            return
+        try:
+            if con is None:
+                con = ensure_db()
+            cur = con.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.executemany(INSERT_SAMPLE_SQL, pending)
+            cur.execute("COMMIT")
+        except Exception as e:
+            error = e
+            try:
+                if con is not None and con.in_transaction:
+                    con.rollback()
+            except Exception:
+                pass
+            dropped = max(0, len(pending) - WRITER_MAX_PENDING)
+            del pending[:dropped]
+            note = f", dropped {dropped} oldest" if dropped else ""
+            print(f"      ! Poll writer: commit of {len(pending) + dropped} row(s) failed, retrying{note}: {e}")
+            deadline = time.monotonic() + WRITER_RETRY_SEC
+            failing = True
+            return
+        pending.clear()
+        failing = False
+
+    try:
+        while True:
+            try:
+                item = q.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                flush()
+                continue
+            if item is None:
+                flush()
+                if pending:
+                    print(f"      ! Poll writer stopped with {len(pending)} unwritten row(s)")
+                break
+            kind, payload = item
+            if kind == "rows":
+                if not pending:
+                    deadline = time.monotonic() + WRITER_FLUSH_SEC
+                pending.extend(payload)
+                # While failing, wait out the retry delay instead of retrying per message
+                if len(pending) >= WRITER_BATCH_ROWS and not failing:
+                    flush()
+            elif kind == "sync":
+                # Report write errors since the last sync back to the waiting cycle
+                flush()
+                ev, box = payload
+                box["error"], error = error, None
+                ev.set()
+    finally:
+        try:
+            if con is not None:
+                con.close()
+        except Exception:
+            pass
+
+
+def _start_writer():
+    q = queue.Queue()
+    threading.Thread(target=_writer_loop, args=(q,), name="poll-writer", daemon=True).start()
+    return q
+
+
+def _sync_writer(q: queue.Queue):
+    """Wait until everything queued so far is committed; re-raise any write error."""
+    ev = threading.Event()
+    box = {}
+    q.put(("sync", (ev, box)))
+    ev.wait()
+    if box.get("error") is not None:
+        raise box["error"]
+
+
+# Devices polled at the same time per cycle (each device's points are read as a batch);
+# also the size of the poller's own BAC0 thread pool
+POLL_CONCURRENCY = 8
+
+
+def _poll_device(bn, addr, devid, group, ts_iso):
+    """
+    Read one device's map entries (blocking BAC0 calls).
+    Returns (sample rows, points read, errors, device helper or None).
+    """
+    sample_devid = devid if devid is not None else -1
+    rows = []
+    ok = 0
+    err = 0
+    try:
+        dev = BAC0.device(address=addr, device_id=devid if devid is not None else None, network=bn)
+    except Exception as ex:
+        for e in group:
+            rows.append(sample_row(ts_iso, sample_devid, e['obj_type'], e['obj_inst'], e['property'], None, quality="poll", msg=f"device_error: {ex}"))
+        return rows, 0, len(group), None
+
+    for start in range(0, len(group), READ_MULTIPLE_CHUNK):
+        chunk = group[start:start + READ_MULTIPLE_CHUNK]
+        # One ReadPropertyMultiple per chunk; fall back to single reads if unsupported
+        values, msg = try_read_multiple(bn, addr, [(e['obj_type'], e['obj_inst'], e['property']) for e in chunk])
+        if values is not None:
+            for e, value in zip(chunk, values):
+                rows.append(sample_row(ts_iso, sample_devid, e['obj_type'], e['obj_inst'], e['property'], value, quality="poll", msg=msg))
+            ok += len(chunk)
+            continue
+        for e in chunk:
+            try:
+                value, msg = _read_point(bn, dev, addr, devid, e)
+                rows.append(sample_row(ts_iso, sample_devid, e['obj_type'], e['obj_inst'], e['property'], value, quality="poll", msg=msg))
+                ok += 1
+            except Exception as ex:
+                err += 1
+                rows.append(sample_row(ts_iso, sample_devid, e['obj_type'], e['obj_inst'], e['property'], None, quality="poll", msg=f"error: {ex}"))
+    return rows, ok, err, dev
 
 
-def _insert_sample(cur, ts_iso, device_id, obj_type, obj_inst, prop, value_raw, quality=None, msg=None):
-    cur.execute(
-        """
-        INSERT INTO samples(ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg)
-        VALUES(?,?,?,?,?,?,?,?)
-        """,
-        (ts_iso, device_id, obj_type, obj_inst, prop, None if value_raw is None else str(value_raw), quality, msg),
-    )
+def _start_pool():
+    # Own threads for blocking BAC0 calls rather than the loop's shared default executor,
+    # which discovery also uses when both run on the web app's loop
+    return ThreadPoolExecutor(max_workers=POLL_CONCURRENCY, thread_name_prefix="poller")
 
 
-def run_once(map_path: str, local_if: str | None = None, local_port: int | None = None, progress=None):
-    entries = _read_map_csv(map_path)
+async def run_once_async(map_path: str, local_if: str | None = None, local_port: int | None = None, progress=None, con=None, writer=None, executor=None):
+    """
+    Poll every point in the map once, reading up to POLL_CONCURRENCY devices at a time.
+    Pass ``con`` (reads, opened on this loop's thread), ``writer`` (a queue from
+    _start_writer) and ``executor`` (from _start_pool) to reuse them across cycles;
+    otherwise they are created per call.
+    """
+    entries = _load_map(map_path)
     if progress:
         try:
             progress({"event": "poll_cycle_start", "points": len(entries)})
@@ -127,14 +350,33 @@ def run_once(map_path: str, local_if: str | None = None, local_port: int | None
     if not entries:
         return {"points": 0, "read": 0, "errors": 0}
 
-    con = ensure_db()
+    own_con = con is None
+    if own_con:
+        con = ensure_db()
     cur = con.cursor()
+    own_writer = writer is None
+    if own_writer:
+        writer = _start_writer()
+    own_pool = executor is None
+    if own_pool:
+        executor = _start_pool()
+    loop = asyncio.get_running_loop()
+
+    def blocking(fn, *args):
+        return loop.run_in_executor(executor, fn, *args)
+
     bn = None
     ok = 0
     err = 0
+    # BAC0 device helpers created this cycle, released at the end
+    devices = []
     try:
-        bn = _create_bacnet_with_fallback(local_if, local_port, progress=progress)
-        ts_iso = datetime.now(timezone.utc).isoformat()
+        bn = await blocking(_create_bacnet_with_fallback, local_if, local_port, progress)
+        ts_iso = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        # Group points by physical device so each device gets one helper and batched reads
+        by_dev = {}
+        # One query for all discovered addresses instead of a lookup per blank-address row
+        addr_map = None
         for e in entries:
             devid = e['device_id']
             addr = e['address']
@@ -142,72 +384,45 @@ def run_once(map_path: str, local_if: str | None = None, local_port: int | None
                 err += 1
                 continue
             if not addr and devid is not None:
-                try:
-                    addr = _resolve_address(cur, devid)
-                except Exception:
-                    addr = None
+                if addr_map is None:
+                    try:
+                        addr_map = dict(cur.execute(DEVICE_ADDRESSES_SQL).fetchall())
+                    except Exception:
+                        addr_map = {}
+                addr = addr_map.get(devid)
             if not addr:
                 err += 1
                 continue
-            try:
-                dev = BAC0.device(address=addr, device_id=devid if devid is not None else None, network=bn)
-            except Exception as ex:
-                err += 1
-                try:
-                    _insert_sample(cur, ts_iso, devid if devid is not None else -1, e['obj_type'], e['obj_inst'], e['property'], None, quality="poll", msg=f"device_error: {ex}")
-                except Exception:
-                    pass
-                continue
+            by_dev.setdefault((addr, devid), []).append(e)
 
-            try:
-                value = None
-                msg = None
-                if (e['property'] or 'presentValue') == 'presentValue':
-                    value, msg = try_read_present_value(bn, dev, e['obj_type'], e['obj_inst'])
-                else:
-                    # generic property read attempts
-                    got = False
-                    for meth in ("read", "read_property", "readProperty"):
-                        try:
-                            m = getattr(dev, meth, None)
-                            if callable(m):
-                                value = m((e['obj_type'], e['obj_inst']), e['property'])
-                                msg = meth
-                                got = True
-                                break
-                        except Exception:
-                            pass
-                    if not got:
-                        for meth in ("read", "read_multiple", "readMultiple"):
-                            try:
-                                m = getattr(bn, meth, None)
-                                if callable(m):
-                                    value = m(address=addr, device_id=devid, obj_id=(e['obj_type'], e['obj_inst']), prop=e['property'])
-                                    msg = f"network.{meth}"
-                                    got = True
-                                    break
-                            except Exception:
-                                pass
-                        if not got:
-                            msg = "unreadable"
-
-                _insert_sample(cur, ts_iso, devid if devid is not None else -1, e['obj_type'], e['obj_inst'], e['property'], value, quality="poll", msg=msg)
-                ok += 1
-            except Exception as ex:
-                err += 1
-                try:
-                    _insert_sample(cur, ts_iso, devid if devid is not None else -1, e['obj_type'], e['obj_inst'], e['property'], None, quality="poll", msg=f"error: {ex}")
-                except Exception:
-                    pass
-        con.commit()
+        sem = asyncio.Semaphore(POLL_CONCURRENCY)
+
+        async def poll_device(addr, devid, group):
+            async with sem:
+                rows, n_ok, n_err, dev = await blocking(_poll_device, bn, addr, devid, group, ts_iso)
+            if dev is not None:
+                devices.append(dev)
+            # Hand the device's rows to the writer thread as soon as they are read
+            writer.put(("rows", rows))
+            return n_ok, n_err
+
+        for n_ok, n_err in await asyncio.gather(*(poll_device(addr, devid, group) for (addr, devid), group in by_dev.items())):
+            ok += n_ok
+            err += n_err
+        await blocking(_sync_writer, writer)
     finally:
         try:
-            if con:
+            if own_con and con:
                 con.close()
         except Exception:
             pass
+        if own_writer:
+            writer.put(None)
+        await blocking(_release_devices, devices)
         if bn is not None:
-            _safe_release_bacnet(bn)
+            await blocking(_safe_release_bacnet, bn)
+        if own_pool:
+            executor.shutdown(wait=False)
 
     if progress:
         try:
@@ -217,27 +432,75 @@ def run_once(map_path: str, local_if: str | None = None, local_port: int | None
     return {"points": len(entries), "read": ok, "errors": err}
 
 
-def run_loop(map_path: str, interval_sec: int, local_if: str | None, local_port: int | None, is_cancelled, progress=None):
-    while True:
-        if is_cancelled and callable(is_cancelled) and is_cancelled():
-            break
+def run_once(map_path: str, local_if: str | None = None, local_port: int | None = None, progress=None, con=None, writer=None, executor=None):
+    """Blocking wrapper around run_once_async() for callers without an event loop."""
+    return asyncio.run(run_once_async(map_path, local_if=local_if, local_port=local_port, progress=progress, con=con, writer=writer, executor=executor))
+
+
+async def run_loop_async(map_path: str, interval_sec: int, local_if: str | None, local_port: int | None, is_cancelled, progress=None, register_cancel=None):
+    """
+    Poll until cancelled. ``register_cancel``, if given, is called with a thread-safe
+    ``trip()`` that wakes the between-cycle wait immediately.
+    """
+    loop = asyncio.get_running_loop()
+    cancel_ev = asyncio.Event()
+
+    def trip():
         try:
-            run_once(map_path, local_if=local_if, local_port=local_port, progress=progress)
-        except Exception as e:
-            if progress:
+            loop.call_soon_threadsafe(cancel_ev.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    # Callers that only pass is_cancelled are re-checked every 0.5 s
+    poll_step = 0.5
+    if register_cancel:
+        try:
+            register_cancel(trip)
+            poll_step = None
+        except Exception:
+            pass
+
+    def _cancelled():
+        return cancel_ev.is_set() or bool(is_cancelled and callable(is_cancelled) and is_cancelled())
+
+    # One read connection, writer thread and BAC0 thread pool for the lifetime of the loop
+    con = ensure_db()
+    writer = _start_writer()
+    pool = _start_pool()
+    try:
+        while not _cancelled():
+            try:
+                await run_once_async(map_path, local_if=local_if, local_port=local_port, progress=progress, con=con, writer=writer, executor=pool)
+            except Exception as e:
+                if progress:
+                    try:
+                        progress({"event": "poll_cycle_error", "error": str(e)})
+                    except Exception:
+                        pass
+            # Sleep between cycles, but wake up early if cancelled
+            deadline = time.monotonic() + max(1, int(interval_sec))
+            while not _cancelled():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
                 try:
-                    progress({"event": "poll_cycle_error", "error": str(e)})
-                except Exception:
+                    await asyncio.wait_for(cancel_ev.wait(), timeout=remaining if poll_step is None else min(remaining, poll_step))
+                except asyncio.TimeoutError:
                     pass
-        # Safety: release BAC0 each cycle is handled inside run_once
-        # Sleep between cycles, but wake up early if cancelled
-        slept = 0
-        step = 0.5
-        while slept < max(1, int(interval_sec)):
-            if is_cancelled and callable(is_cancelled) and is_cancelled():
-                break
-            time.sleep(step)
-            slept += step
-        if is_cancelled and callable(is_cancelled) and is_cancelled():
-            break
+    finally:
+        writer.put(None)
+        pool.shutdown(wait=False)
+        try:
+            con.close()
+        except Exception:
+            pass
+
+
+def run_loop(map_path: str, interval_sec: int, local_if: str | None, local_port: int | None, is_cancelled, progress=None, cancel_event: threading.Event | None = None):
+    """Blocking wrapper around run_loop_async(). Setting ``cancel_event`` stops it within ~0.5 s."""
+    def cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            return True
+        return bool(is_cancelled and callable(is_cancelled) and is_cancelled())
 
+    return asyncio.run(run_loop_async(map_path, interval_sec, local_if, local_port, cancelled, progress=progress))
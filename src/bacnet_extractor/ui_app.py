@@ -4,12 +4,11 @@ from __future__ import annotations
 
 import os
 import threading
-import time
-import urllib.request
 
 import webview
+from werkzeug.serving import make_server
 
-from .webapp import run as run_webapp
+from .webapp import app
 
 
 DEFAULT_HOST = os.getenv("BACNET_UI_HOST", "127.0.0.1")
@@ -18,16 +17,16 @@ SERVER_START_TIMEOUT = float(os.getenv("BACNET_UI_WAIT", "30"))
 DEFAULT_TITLE = os.getenv("BACNET_UI_TITLE", "Triton Edge Data Gateway")
 
 
-def _wait_for_server(url: str, timeout: float) -> bool:
-  """Poll the Flask server until it responds or the timeout elapses."""
-  deadline = time.time() + timeout
-  while time.time() < deadline:
-    try:
-      with urllib.request.urlopen(url, timeout=2):
-        return True
-    except Exception:
-      time.sleep(0.5)
-  return False
+def _serve(host: str, port: int, ready: threading.Event, errors: list) -> None:
+  """Bind the Flask app, signal readiness once the socket is listening, then serve forever."""
+  try:
+    server = make_server(host, port, app, threaded=True)
+  except Exception as e:
+    errors.append(e)
+    ready.set()
+    return
+  ready.set()
+  server.serve_forever()
 
 
 def main() -> None:
@@ -36,11 +35,15 @@ def main() -> None:
   url = f"http://{host}:{port}"
 
   # Run the Flask app on a background thread so the GUI can share the same process.
-  server_thread = threading.Thread(target=run_webapp, kwargs={"host": host, "port": port}, daemon=True)
+  ready = threading.Event()
+  errors: list = []
+  server_thread = threading.Thread(target=_serve, args=(host, port, ready, errors), daemon=True)
   server_thread.start()
 
-  if not _wait_for_server(url, SERVER_START_TIMEOUT):
+  if not ready.wait(SERVER_START_TIMEOUT):
     raise RuntimeError(f"Web UI did not start within {SERVER_START_TIMEOUT} seconds at {url}")
+  if errors:
+    raise RuntimeError(f"Web UI failed to start at {url}: {errors[0]}")
 
   webview.create_window(DEFAULT_TITLE, url)
   webview.start()
@@ -1,33 +1,77 @@
 import os
 import threading
 import time
-from datetime import datetime
+from collections import deque
 from pathlib import Path
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify, Response
+from flask import Flask, render_template, request, redirect, url_for, jsonify, Response, send_file
 
 from .discover import async_main as discover_async
-from .db import get_db_path
-from .poller import run_loop as poller_run_loop
+from .db import SAMPLE_VALUE_SQL, add_sample_functions, ensure_db, get_db_path, number_text
+from .poller import run_loop_async as poller_run_loop
 import sqlite3
 import asyncio
 import csv
 import io
 import json
+from json.encoder import encode_basestring
+import queue
+import shutil
+import zlib
+from concurrent.futures import wait as wait_futures
+from contextlib import closing, contextmanager
 
 try:
     import psutil
 except ImportError:  # pragma: no cover
     psutil = None
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover
+    duckdb = None
+
+try:
+    from waitress import serve as waitress_serve
+except ImportError:  # pragma: no cover
+    waitress_serve = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pragma: no cover
+    pa = None
+
+if orjson is not None:
+    _dumps = orjson.dumps
+else:  # pragma: no cover
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+# Project root (holds templates/ and static/), resolved once
+_ROOT_DIR = Path(__file__).resolve().parents[2]
 
 app = Flask(
     __name__,
-    template_folder=str(Path(__file__).resolve().parents[2] / "templates"),
-    static_folder=str(Path(__file__).resolve().parents[2] / "static"),
+    template_folder=str(_ROOT_DIR / "templates"),
+    static_folder=str(_ROOT_DIR / "static"),
 )
 
 
+# Recent events kept per state; older ones fall off the deque
+EVENTS_MAX = 500
+
 RUN_STATE = {
     "status": "idle",  # idle | running | done | error
     "started_at": None,
@@ -38,12 +82,19 @@ RUN_STATE = {
     "device_stats": {},  # device_id -> {address, objects, snapshot}
     "error": None,
     "cancel": False,
-    "events": [],  # recent activity log
+    "events": deque(maxlen=EVENTS_MAX),  # recent activity log
     "last_options": {"local": None, "port": 47808, "sleep": 0.1, "snapshot": False},
 }
 
-_RUN_THREAD = None
+_RUN_FUTURE = None  # concurrent.futures.Future of the discovery coroutine on _BG_LOOP
 _RUN_LOCK = threading.Lock()
+# Bumped after each RUN_STATE mutation; /status.json rebuilds its cached copy only when it moves
+_RUN_VERSION = 0
+_RUN_SNAPSHOT = (-1, None)
+# Notified on every version bump; /events streams wait on it
+_RUN_CHANGED = threading.Condition()
+# trip() handed out by discover.async_main; wakes its inter-device delay on cancel
+_RUN_TRIP = None
 
 # Extraction poller state
 POLL_STATE = {
@@ -52,7 +103,7 @@ POLL_STATE = {
     "finished_at": None,
     "last_error": None,
     "last_event": None,
-    "events": [],
+    "events": deque(maxlen=EVENTS_MAX),
     "cancel": False,
     "interval_sec": None,
     "project": None,
@@ -60,8 +111,80 @@ POLL_STATE = {
     "last_cycle": {"points": 0, "read": 0, "errors": 0, "ts": None},
 }
 
-_POLL_THREAD = None
+_POLL_FUTURE = None  # concurrent.futures.Future of the poller coroutine on _BG_LOOP
 _POLL_LOCK = threading.Lock()
+# trip() handed out by poller.run_loop_async; wakes its between-cycle wait on cancel
+_POLL_TRIP = None
+# Set when the current poller run has fully exited; replaced per run
+_POLL_DONE = threading.Event()
+_POLL_DONE.set()
+_POLL_VERSION = 0
+_POLL_SNAPSHOT = (-1, None)
+
+
+def _run_changed():
+    global _RUN_VERSION
+    with _RUN_CHANGED:
+        _RUN_VERSION += 1
+        _RUN_CHANGED.notify_all()
+
+
+def _poll_changed():
+    global _POLL_VERSION
+    _POLL_VERSION += 1
+
+
+def _copy_state(state: dict) -> dict:
+    # Shallow-copy nested dicts/lists so a snapshot is not mutated by later updates
+    out = {}
+    for k, v in state.items():
+        if isinstance(v, dict):
+            out[k] = dict(v)
+        elif isinstance(v, (list, deque)):
+            out[k] = list(v)
+        else:
+            out[k] = v
+    return out
+
+
+def _run_snapshot() -> dict:
+    """Copy of RUN_STATE, rebuilt only when it changed since the last call. Do not mutate."""
+    global _RUN_SNAPSHOT
+    ver, snap = _RUN_SNAPSHOT
+    if ver != _RUN_VERSION:
+        with _RUN_LOCK:
+            ver = _RUN_VERSION
+            snap = _copy_state(RUN_STATE)
+        _RUN_SNAPSHOT = (ver, snap)
+    return snap
+
+
+def _poll_snapshot() -> dict:
+    """Copy of POLL_STATE, rebuilt only when it changed since the last call. Do not mutate."""
+    global _POLL_SNAPSHOT
+    ver, snap = _POLL_SNAPSHOT
+    if ver != _POLL_VERSION:
+        with _POLL_LOCK:
+            ver = _POLL_VERSION
+            snap = _copy_state(POLL_STATE)
+        _POLL_SNAPSHOT = (ver, snap)
+    return snap
+
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") reused for every event within that second
+_TS_CACHE = (None, "")
+
+
+def _utc_ts() -> str:
+    """Same format as datetime.utcnow().isoformat(), without building a datetime per event."""
+    global _TS_CACHE
+    t = time.time()
+    sec = int(t)
+    cached_sec, base = _TS_CACHE
+    if cached_sec != sec:
+        base = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _TS_CACHE = (sec, base)
+    return f"{base}.{int((t - sec) * 1000000):06d}"
 
 
 def _process_memory():
@@ -76,75 +199,158 @@ def _process_memory():
     }
 
 
+# Discovery progress events are queued lock-free and applied to RUN_STATE in batches
+_EVENT_QUEUE = queue.SimpleQueue()
+_EVENT_FLUSHER = None
+_EVENT_FLUSHER_LOCK = threading.Lock()
+EVENT_BATCH = 64
+
+
 def _progress(event: dict):
-    # Serialize updates to RUN_STATE to avoid race conditions
-    with _RUN_LOCK:
-        RUN_STATE["last_event"] = event
-        ev = dict(event)
-        ev.setdefault("ts", datetime.utcnow().isoformat())
-        RUN_STATE["events"].append(ev)
-        if len(RUN_STATE["events"]) > 500:
-            RUN_STATE["events"] = RUN_STATE["events"][-500:]
-        t = event.get("event")
-        if t == "start":
-            RUN_STATE.update({
-                "status": "running",
-                "started_at": event.get("ts"),
-                "finished_at": None,
-                "total_devices": 0,
-                "completed": 0,
-                "device_stats": {},
-                "error": None,
-            })
-        elif t == "whois_complete":
-            RUN_STATE["total_devices"] = int(event.get("total_devices") or 0)
-        elif t == "device_start":
-            did = int(event.get("device_id"))
-            RUN_STATE["device_stats"].setdefault(did, {"address": event.get("address"), "objects": 0, "snapshot": 0})
-        elif t == "device_objects":
-            did = int(event.get("device_id"))
-            RUN_STATE["device_stats"].setdefault(did, {})["objects"] = int(event.get("count") or 0)
-        elif t == "device_snapshot":
-            did = int(event.get("device_id"))
-            RUN_STATE["device_stats"].setdefault(did, {})["snapshot"] = int(event.get("count") or 0)
-        elif t == "device_done":
-            RUN_STATE["completed"] = min(RUN_STATE.get("completed", 0) + 1, RUN_STATE.get("total_devices", 0))
-        elif t == "device_error":
-            # Count as completed
-            RUN_STATE["completed"] = min(RUN_STATE.get("completed", 0) + 1, RUN_STATE.get("total_devices", 0))
-        elif t == "cancelled":
-            RUN_STATE["status"] = "stopping"
-        elif t == "complete":
-            RUN_STATE["status"] = "done"
-            RUN_STATE["finished_at"] = datetime.utcnow().isoformat()
-
-
-def _run_discovery(local_if: str | None, port: int | None, sleep_sec: float, snapshot: bool):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    ev = dict(event)
+    if "ts" not in ev:
+        ev["ts"] = _utc_ts()
+    _EVENT_QUEUE.put((event, ev))
+    if _EVENT_FLUSHER is None:
+        _start_event_flusher()
+
+
+def _start_event_flusher():
+    global _EVENT_FLUSHER
+    with _EVENT_FLUSHER_LOCK:
+        if _EVENT_FLUSHER is None:
+            _EVENT_FLUSHER = threading.Thread(target=_event_flusher, name="run-events", daemon=True)
+            _EVENT_FLUSHER.start()
+
+
+def _event_flusher():
+    while True:
+        batch = [_EVENT_QUEUE.get()]
+        try:
+            while len(batch) < EVENT_BATCH:
+                batch.append(_EVENT_QUEUE.get_nowait())
+        except queue.Empty:
+            pass
+        barriers = []
+        # One lock acquisition per batch instead of per event
+        with _RUN_LOCK:
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    barriers.append(item)
+                else:
+                    _apply_progress(*item)
+            _run_changed()
+        for b in barriers:
+            b.set()
+
+
+def _flush_progress(timeout: float = 2.0):
+    """Block until every event queued before this call has been applied to RUN_STATE."""
+    done = threading.Event()
+    _EVENT_QUEUE.put(done)
+    if _EVENT_FLUSHER is None:
+        _start_event_flusher()
+    done.wait(timeout)
+
+
+def _apply_progress(event: dict, ev: dict):
+    # Caller holds _RUN_LOCK
+    RUN_STATE["last_event"] = event
+    RUN_STATE["events"].append(ev)
+    t = event.get("event")
+    if t == "start":
+        RUN_STATE.update({
+            "status": "running",
+            "started_at": event.get("ts"),
+            "finished_at": None,
+            "total_devices": 0,
+            "completed": 0,
+            "device_stats": {},
+            "error": None,
+        })
+    elif t == "whois_complete":
+        RUN_STATE["total_devices"] = int(event.get("total_devices") or 0)
+    elif t == "device_start":
+        did = int(event.get("device_id"))
+        RUN_STATE["device_stats"].setdefault(did, {"address": event.get("address"), "objects": 0, "snapshot": 0})
+    elif t == "device_objects":
+        did = int(event.get("device_id"))
+        # Replace rather than mutate per-device dicts so earlier snapshots stay unchanged
+        RUN_STATE["device_stats"][did] = {**RUN_STATE["device_stats"].get(did, {}), "objects": int(event.get("count") or 0)}
+    elif t == "device_snapshot":
+        did = int(event.get("device_id"))
+        RUN_STATE["device_stats"][did] = {**RUN_STATE["device_stats"].get(did, {}), "snapshot": int(event.get("count") or 0)}
+    elif t == "device_done":
+        RUN_STATE["completed"] = min(RUN_STATE.get("completed", 0) + 1, RUN_STATE.get("total_devices", 0))
+    elif t == "device_error":
+        # Count as completed
+        RUN_STATE["completed"] = min(RUN_STATE.get("completed", 0) + 1, RUN_STATE.get("total_devices", 0))
+    elif t == "cancelled":
+        RUN_STATE["status"] = "stopping"
+    elif t == "complete":
+        RUN_STATE["status"] = "done"
+        RUN_STATE["finished_at"] = _utc_ts()
+
+
+def _register_trip(trip):
+    global _RUN_TRIP
+    _RUN_TRIP = trip
+
+
+def _request_cancel():
+    # Caller holds _RUN_LOCK
+    RUN_STATE["cancel"] = True
+    _run_changed()
+    trip = _RUN_TRIP
+    if trip:
+        trip()
+
+
+# One long-lived event loop (own daemon thread) for discovery and poller runs, started on first use
+_BG_LOOP = None
+_BG_LOOP_LOCK = threading.Lock()
+
+
+def _bg_loop():
+    global _BG_LOOP
+    with _BG_LOOP_LOCK:
+        if _BG_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="bg-asyncio", daemon=True).start()
+            _BG_LOOP = loop
+        return _BG_LOOP
+
+
+def _wait_run(fut, timeout: float):
+    # Best-effort wait for a discovery run to finish and release its sockets
+    if fut is not None and not fut.done():
+        wait_futures([fut], timeout=timeout)
+
+
+async def _run_discovery(local_if: str | None, port: int | None, sleep_sec: float, snapshot: bool):
+    error = None
     try:
-        loop.run_until_complete(discover_async(local_if, sleep_sec, port, snapshot, progress=_progress, is_cancelled=lambda: RUN_STATE.get("cancel", False)))
+        await discover_async(local_if, sleep_sec, port, snapshot, progress=_progress, is_cancelled=lambda: RUN_STATE.get("cancel", False), register_cancel=_register_trip)
     except Exception as e:
+        error = e
+    # Let queued progress (e.g. "complete") land before deciding the final status
+    await asyncio.to_thread(_flush_progress)
+    if error is not None:
         RUN_STATE["status"] = "error"
-        RUN_STATE["error"] = str(e)
-    finally:
-        try:
-            loop.close()
-        except Exception:
-            pass
+        RUN_STATE["error"] = str(error)
     if RUN_STATE.get("cancel") and RUN_STATE.get("status") not in ("error", "done"):
         RUN_STATE["status"] = "stopped"
-        RUN_STATE["finished_at"] = datetime.utcnow().isoformat()
+        RUN_STATE["finished_at"] = _utc_ts()
+    _run_changed()
 
 
 def _poll_progress(event: dict):
     with _POLL_LOCK:
         POLL_STATE["last_event"] = event
         ev = dict(event)
-        ev.setdefault("ts", datetime.utcnow().isoformat())
+        if "ts" not in ev:
+            ev["ts"] = _utc_ts()
         POLL_STATE["events"].append(ev)
-        if len(POLL_STATE["events"]) > 500:
-            POLL_STATE["events"] = POLL_STATE["events"][-500:]
         t = event.get("event")
         if t == "poll_cycle_start":
             POLL_STATE["last_cycle"] = {"points": int(event.get("points") or 0), "read": 0, "errors": 0, "ts": ev["ts"]}
@@ -152,24 +358,30 @@ def _poll_progress(event: dict):
             POLL_STATE["last_cycle"] = {"points": int(event.get("points") or 0), "read": int(event.get("read") or 0), "errors": int(event.get("errors") or 0), "ts": ev["ts"]}
         elif t == "poll_cycle_error":
             POLL_STATE["last_error"] = str(event.get("error") or "error")
+        _poll_changed()
 
 
 def _start_discovery(local_if: str | None, port: int | None, sleep_sec: float, snapshot: bool):
-    global _RUN_THREAD
+    global _RUN_FUTURE, _RUN_TRIP
+    _RUN_TRIP = None
     RUN_STATE.update({
         "status": "running",
-        "started_at": datetime.utcnow().isoformat(),
+        "started_at": _utc_ts(),
         "finished_at": None,
         "total_devices": 0,
         "completed": 0,
         "device_stats": {},
         "error": None,
         "cancel": False,
-        "events": [],
+        "events": deque(maxlen=EVENTS_MAX),
         "last_options": {"local": local_if, "port": port, "sleep": sleep_sec, "snapshot": snapshot},
     })
-    _RUN_THREAD = threading.Thread(target=_run_discovery, args=(local_if, port, sleep_sec, snapshot), daemon=True)
-    _RUN_THREAD.start()
+    _run_changed()
+    _RUN_FUTURE = asyncio.run_coroutine_threadsafe(_run_discovery(local_if, port, sleep_sec, snapshot), _bg_loop())
+
+
+# (data_dir, dir mtime_ns) -> sorted map paths; cleared on upload
+_MAP_FILES_CACHE = {"key": None, "files": []}
 
 
 def _list_map_files():
@@ -177,57 +389,639 @@ def _list_map_files():
         data_dir = Path(get_db_path()).resolve().parents[0]
     except Exception:
         data_dir = Path("data")
-    maps = []
-    if data_dir.exists():
-        for p in sorted(data_dir.glob("extraction_map_*.csv")):
-            maps.append(p)
-    return maps
+    try:
+        key = (str(data_dir), data_dir.stat().st_mtime_ns)
+    except OSError:
+        return []
+    if _MAP_FILES_CACHE["key"] == key:
+        return list(_MAP_FILES_CACHE["files"])
+    maps = sorted(data_dir.glob("extraction_map_*.csv"))
+    _MAP_FILES_CACHE.update(key=key, files=maps)
+    return list(maps)
+
+
+def _register_poll_trip(trip):
+    global _POLL_TRIP
+    _POLL_TRIP = trip
 
 
 def _start_poller(map_path: str, interval_sec: int, local_if: str | None, local_port: int | None):
-    def _runner():
+    done_event = threading.Event()
+
+    async def _runner():
         loop_fn = poller_run_loop
+        # Every mutation and its version bump happen under _POLL_LOCK (see _poll_snapshot)
         try:
-            POLL_STATE.update({
-                "status": "running",
-                "started_at": datetime.utcnow().isoformat(),
-                "finished_at": None,
-                "last_error": None,
-                "events": [],
-            })
-            loop_fn(map_path, int(interval_sec), local_if, local_port, is_cancelled=lambda: POLL_STATE.get("cancel", False), progress=_poll_progress)
+            with _POLL_LOCK:
+                POLL_STATE.update({
+                    "status": "running",
+                    "started_at": _utc_ts(),
+                    "finished_at": None,
+                    "last_error": None,
+                    "events": deque(maxlen=EVENTS_MAX),
+                })
+                _poll_changed()
+            await loop_fn(map_path, int(interval_sec), local_if, local_port, is_cancelled=lambda: POLL_STATE.get("cancel", False), progress=_poll_progress, register_cancel=_register_poll_trip)
             # If we exit naturally due to cancel, mark stopped
-            if POLL_STATE.get("cancel") and POLL_STATE.get("status") not in ("error",):
-                POLL_STATE["status"] = "stopped"
+            with _POLL_LOCK:
+                if POLL_STATE.get("cancel") and POLL_STATE.get("status") not in ("error",):
+                    POLL_STATE["status"] = "stopped"
+                    _poll_changed()
         except Exception as e:
-            POLL_STATE["status"] = "error"
-            POLL_STATE["last_error"] = str(e)
+            with _POLL_LOCK:
+                POLL_STATE["status"] = "error"
+                POLL_STATE["last_error"] = str(e)
+                _poll_changed()
         finally:
-            POLL_STATE["finished_at"] = datetime.utcnow().isoformat()
-            POLL_STATE["cancel"] = False
+            with _POLL_LOCK:
+                POLL_STATE["finished_at"] = _utc_ts()
+                POLL_STATE["cancel"] = False
+                _poll_changed()
+            done_event.set()
 
-    global _POLL_THREAD
+    global _POLL_FUTURE, _POLL_TRIP, _POLL_DONE
     with _POLL_LOCK:
         if POLL_STATE.get("status") == "running":
             return False
+        _POLL_TRIP = None
+        _POLL_DONE = done_event
         POLL_STATE.update({
             "status": "running",
-            "started_at": datetime.utcnow().isoformat(),
+            "started_at": _utc_ts(),
             "finished_at": None,
             "cancel": False,
         })
-        _POLL_THREAD = threading.Thread(target=_runner, daemon=True)
-        _POLL_THREAD.start()
+        _poll_changed()
+        # Shares the background loop with discovery; BAC0 reads run in worker threads
+        _POLL_FUTURE = asyncio.run_coroutine_threadsafe(_runner(), _bg_loop())
     return True
 
 
+# Server threads for pages, status polls and exports; /events streams get SSE_MAX_CLIENTS more
+WEB_THREADS = 8
+# Read-only connections reused across requests instead of reopening the DB (+ -wal/-shm) each time.
+# One idle connection per server thread; each keeps its own compiled-statement cache,
+# so the module-level route SQL is parsed once per connection, not per request.
+_READ_POOL = queue.Queue(maxsize=WEB_THREADS)
+_SCHEMA_READY = False
+_SCHEMA_LOCK = threading.Lock()
+# Rows per fetchmany()/writerows() batch in CSV exports
+CSV_FETCH_ROWS = 1000
+# Rows per encoded batch in streamed JSON exports
+JSON_FETCH_ROWS = 500
+# Streamed exports hand the WSGI server chunks of at least this size (except the last)
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
 def db_connect():
-    con = sqlite3.connect(get_db_path())
+    global _SCHEMA_READY
+    if not _SCHEMA_READY:
+        with _SCHEMA_LOCK:
+            if not _SCHEMA_READY:
+                # Bring an older DB up to the current schema before the first read;
+                # a failure is raised to the request and retried by the next one
+                ensure_db().close()
+                _SCHEMA_READY = True
+    # Plain tuple rows: every route and template reads columns by position.
+    # Autocommit: the web UI only reads, so no implicit transactions are opened.
+    con = sqlite3.connect(get_db_path(), check_same_thread=False, isolation_level=None)
+    add_sample_functions(con)
+    for pragma in ("PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL",
+                   "PRAGMA mmap_size=268435456", "PRAGMA cache_size=-64000",
+                   "PRAGMA temp_store=MEMORY", "PRAGMA busy_timeout=5000",
+                   # Last: refuses writes (incl. the journal_mode switch above)
+                   "PRAGMA query_only=1"):
+        try:
+            con.execute(pragma)
+        except sqlite3.Error:
+            pass
+    return con
+
+
+def _csv_line(cols) -> str:
+    buff = io.StringIO()
+    csv.writer(buff).writerow(cols)
+    return buff.getvalue()
+
+
+# Header lines are formatted once; _csv_chunks() writes them into its text buffer as-is
+OBJECTS_CSV_HEADER = _csv_line(["device_id", "address", "vendor", "model", "obj_type", "obj_inst", "obj_name"])
+DEVICES_CSV_HEADER = _csv_line(["device_id", "address", "vendor_name", "model_name", "vendor_id", "max_apdu", "segmentation", "firmware_rev", "app_software", "last_seen_utc"])
+SAMPLES_CSV_HEADER = _csv_line(["ts_utc", "device_id", "obj_type", "obj_inst", "property", "value_raw", "quality", "msg"])
+
+
+def _csv_chunks(cur, header: str):
+    """Yield header + rows of cur as UTF-8 chunks of about STREAM_CHUNK_BYTES."""
+    # Text buffer encoded once per chunk; cheaper than a TextIOWrapper encoding every row
+    buf = io.StringIO()
+    buf.write(header)
+    w = csv.writer(buf)
+    while rows := cur.fetchmany(CSV_FETCH_ROWS):
+        w.writerows(rows)
+        if buf.tell() >= STREAM_CHUNK_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+# Content-Encoding levels for streamed exports: cheap settings, these outputs compress well anyway
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 5
+
+
+def _stream_encoding():
+    """Best Content-Encoding the client accepts for a streamed export, or None."""
+    accept = request.accept_encodings
+    if zstandard is not None and accept["zstd"]:
+        return "zstd"
+    if accept["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress_chunks(chunks, encoding: str):
+    if encoding == "zstd":
+        comp = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    else:
+        comp = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+# Chunks a streamed export may run ahead of the client
+STREAM_PREFETCH_CHUNKS = 8
+_STREAM_END = object()
+
+
+def _prefetched(chunks):
+    """
+    Iterate chunks on a worker thread, at most STREAM_PREFETCH_CHUNKS ahead, so DB reads
+    and encoding overlap with socket writes. Starts on first next(); if the client goes
+    away the producer stops and closes chunks (releasing its cursor/connection).
+    """
+    q = queue.Queue(maxsize=STREAM_PREFETCH_CHUNKS)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        last = _STREAM_END
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    break
+        except Exception as e:
+            last = e
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+            put(last)
+
+    threading.Thread(target=produce, name="export-producer", daemon=True).start()
     try:
-        con.row_factory = sqlite3.Row
-    except Exception:
+        while (item := q.get()) is not _STREAM_END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def stream_response(chunks, mimetype: str, headers: dict):
+    """Response for a streamed export, compressed on the fly when the client accepts it."""
+    headers = dict(headers, Vary="Accept-Encoding")
+    encoding = _stream_encoding()
+    if encoding is not None:
+        chunks = _compress_chunks(chunks, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(_prefetched(chunks), mimetype=mimetype, headers=headers)
+
+
+def _db_mtime_ns() -> int:
+    # In WAL mode commits touch the -wal file; checkpoints touch the main file
+    db = get_db_path()
+    mtime = 0
+    for p in (db, db + "-wal"):
+        try:
+            mtime = max(mtime, os.stat(p).st_mtime_ns)
+        except OSError:
+            pass
+    return mtime
+
+
+def cached_csv_response(name: str, sql: str, header: str):
+    """
+    Full-table CSV export backed by data/cache/<name>. The cached file is stamped with
+    the DB mtime it was rendered from and is served with send_file() while that still
+    matches; otherwise the export is streamed from SQLite and written to the cache as it goes.
+    """
+    path = Path(get_db_path()).resolve().parent / "cache" / name
+    src = _db_mtime_ns()
+    try:
+        if src and path.stat().st_mtime_ns == src:
+            return send_file(path, mimetype="text/csv", as_attachment=True, download_name=name, conditional=True)
+    except OSError:
         pass
-    return con
+
+    def generate():
+        tmp_path = path.with_name(f"{name}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = open(tmp_path, "wb")
+        except OSError:
+            tmp = None
+        complete = False
+        try:
+            with db_conn() as con, closing(con.cursor()) as cur:
+                cur.execute(sql)
+                for chunk in _csv_chunks(cur, header):
+                    if tmp is not None:
+                        tmp.write(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if tmp is not None:
+                tmp.close()
+                try:
+                    if complete and src:
+                        os.utime(tmp_path, ns=(src, src))
+                        os.replace(tmp_path, path)
+                except OSError as e:
+                    # e.g. on Windows while another request is still sending the cached file
+                    app.logger.warning("Could not update CSV cache %s: %s", path, e)
+                finally:
+                    # Still there after a failed (or skipped) replace; never leave it behind
+                    try:
+                        tmp_path.unlink(missing_ok=True)
+                    except OSError:
+                        pass
+    headers = {"Content-Disposition": f"attachment; filename={name}"}
+    return stream_response(generate(), "text/csv", headers)
+
+
+# One SAMPLE_KEYS object with the keys and punctuation pre-rendered; only values are encoded per row
+_SAMPLE_JSON_ROW = '{"ts_utc":%s,"device_id":%d,"obj_type":%s,"obj_inst":%d,"property":%s,"value_raw":%s,"quality":%s,"msg":%s}'
+
+
+def _format_sample_rows(rows) -> list:
+    """Rows rendered through _SAMPLE_JSON_ROW; TypeError on a value outside the schema's types."""
+    esc = encode_basestring
+    return [
+        _SAMPLE_JSON_ROW % (
+            esc(ts), dev, esc(otype), oinst, esc(prop),
+            "null" if val is None else esc(val),
+            "null" if qual is None else esc(qual),
+            "null" if msg is None else esc(msg),
+        )
+        # Unpack once instead of indexing each row eight times
+        for ts, dev, otype, oinst, prop, val, qual, msg in rows
+    ]
+
+
+def _encode_sample_rows(rows) -> bytes:
+    """SAMPLE_KEYS objects for rows, comma-separated without the enclosing brackets."""
+    if orjson is not None:
+        # orjson's batched dict encode beats per-value templating
+        return orjson.dumps([dict(zip(SAMPLE_KEYS, r)) for r in rows])[1:-1]
+    try:
+        return ",".join(_format_sample_rows(rows)).encode("utf-8")
+    except TypeError:
+        # A value outside the schema's types; let json handle it
+        return _dumps([dict(zip(SAMPLE_KEYS, r)) for r in rows])[1:-1]
+
+
+def _encode_sample_lines(rows) -> bytes:
+    """SAMPLE_KEYS objects for rows as NDJSON, one newline-terminated object per row."""
+    if orjson is not None:
+        opt = orjson.OPT_APPEND_NEWLINE
+        return b"".join([orjson.dumps(dict(zip(SAMPLE_KEYS, r)), option=opt) for r in rows])
+    try:
+        lines = _format_sample_rows(rows)
+    except TypeError:
+        return b"".join([_dumps(dict(zip(SAMPLE_KEYS, r))) + b"\n" for r in rows])
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _json_array_chunks(cur, encode_rows):
+    """
+    Yield a JSON array built from cur as UTF-8 chunks of about STREAM_CHUNK_BYTES;
+    encode_rows(batch) returns the batch's elements without brackets.
+    """
+    buf = bytearray(b"[")
+    first = True
+    while rows := cur.fetchmany(JSON_FETCH_ROWS):
+        if not first:
+            buf += b","
+        first = False
+        buf += encode_rows(rows)
+        if len(buf) >= STREAM_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    buf += b"]"
+    yield bytes(buf)
+
+
+def _ndjson_chunks(cur, encode_lines):
+    """
+    Yield NDJSON built from cur as UTF-8 chunks of about STREAM_CHUNK_BYTES;
+    encode_lines(batch) returns the batch's newline-terminated lines.
+    """
+    buf = bytearray()
+    while rows := cur.fetchmany(JSON_FETCH_ROWS):
+        buf += encode_lines(rows)
+        if len(buf) >= STREAM_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+# Rows per RecordBatch in the Arrow export
+ARROW_BATCH_ROWS = 65536
+
+if pa is not None:
+    SAMPLES_ARROW_SCHEMA = pa.schema([
+        ("ts_utc", pa.string()),
+        ("device_id", pa.int64()),
+        ("obj_type", pa.string()),
+        ("obj_inst", pa.int64()),
+        ("property", pa.string()),
+        ("value_raw", pa.string()),
+        ("quality", pa.string()),
+        ("msg", pa.string()),
+    ])
+
+
+def _sqlite_record_batches(cur, schema):
+    """RecordBatches of schema built from cur, one per fetchmany() batch."""
+    while rows := cur.fetchmany(ARROW_BATCH_ROWS):
+        cols = [pa.array(col, type=f.type) for col, f in zip(zip(*rows), schema)]
+        yield pa.RecordBatch.from_arrays(cols, schema=schema)
+
+
+def _arrow_chunks(batches, schema):
+    """Yield an Arrow IPC stream, one message chunk per RecordBatch."""
+    sink = io.BytesIO()
+    with pa_ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # End-of-stream marker written on close
+    if sink.tell():
+        yield sink.getvalue()
+
+
+def json_response(obj):
+    """jsonify() equivalent that encodes with orjson when available."""
+    if orjson is None:
+        return jsonify(obj)
+    body = orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    return Response(body, mimetype="application/json")
+
+
+def _sse(obj) -> str:
+    if orjson is not None:
+        payload = orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    else:
+        payload = json.dumps(obj, default=str, separators=(",", ":"))
+    return f"data: {payload}\n\n"
+
+
+@contextmanager
+def db_conn():
+    """Borrow a pooled read connection; it is returned to the pool, not closed, on exit."""
+    try:
+        con = _READ_POOL.get_nowait()
+    except queue.Empty:
+        con = db_connect()
+    try:
+        yield con
+    finally:
+        try:
+            if con.in_transaction:
+                con.rollback()
+            _READ_POOL.put_nowait(con)
+        except (queue.Full, sqlite3.Error):
+            con.close()
+
+
+# JSON field names, in SELECT column order
+DEVICE_LIST_KEYS = ("device_id", "address", "vendor_name", "model_name", "last_seen_utc")
+POINT_KEYS = ("device_id", "address", "vendor", "model", "obj_type", "obj_inst", "obj_name")
+DEVICE_KEYS = ("device_id", "address", "vendor_name", "model_name", "vendor_id", "max_apdu", "segmentation", "firmware_rev", "app_software", "last_seen_utc")
+SAMPLE_KEYS = ("ts_utc", "device_id", "obj_type", "obj_inst", "property", "value_raw", "quality", "msg")
+
+# Route queries live at module scope so every request reuses the same statement text
+DEVICE_LIST_SQL = "SELECT device_id, address, vendor_name, model_name, last_seen_utc FROM devices ORDER BY device_id"
+DEVICE_DETAIL_SQL = "SELECT device_id, address, vendor_name, model_name, last_seen_utc FROM devices WHERE device_id=?"
+DEVICE_DETAIL_OBJECTS_SQL = "SELECT obj_type, obj_inst, obj_name FROM objects WHERE device_id=? ORDER BY obj_type, obj_inst"
+DEVICE_DETAIL_SAMPLES_SQL = f"""
+    SELECT obj_type, obj_inst, property, {SAMPLE_VALUE_SQL}, ts_utc
+    FROM samples WHERE device_id=? ORDER BY ts_utc DESC LIMIT 100
+"""
+OBJECT_COUNTS_SQL = "SELECT device_id, COALESCE(vendor_name,''), COALESCE(model_name,''), object_count FROM devices ORDER BY device_id"
+POINTS_SQL = """
+    SELECT o.device_id,
+           COALESCE(d.address, ''),
+           COALESCE(d.vendor_name, ''),
+           COALESCE(d.model_name, ''),
+           o.obj_type,
+           o.obj_inst,
+           COALESCE(o.obj_name, '')
+    FROM objects o
+    LEFT JOIN devices d ON d.device_id = o.device_id
+    ORDER BY o.device_id, o.obj_type, o.obj_inst
+"""
+DEVICES_SQL = """
+    SELECT device_id,
+           address,
+           vendor_name,
+           model_name,
+           vendor_id,
+           max_apdu,
+           segmentation,
+           firmware_rev,
+           app_software,
+           last_seen_utc
+    FROM devices
+    ORDER BY device_id
+"""
+DEVICES_CSV_SQL = """
+    SELECT device_id,
+           address,
+           COALESCE(vendor_name,''),
+           COALESCE(model_name,''),
+           COALESCE(vendor_id,''),
+           COALESCE(max_apdu,''),
+           COALESCE(segmentation,''),
+           COALESCE(firmware_rev,''),
+           COALESCE(app_software,''),
+           last_seen_utc
+    FROM devices
+    ORDER BY device_id
+"""
+DEVICE_OBJECTS_SQL = """
+    SELECT o.device_id,
+           COALESCE(d.address, ''),
+           COALESCE(d.vendor_name, ''),
+           COALESCE(d.model_name, ''),
+           o.obj_type,
+           o.obj_inst,
+           COALESCE(o.obj_name, '')
+    FROM objects o
+    LEFT JOIN devices d ON d.device_id = o.device_id
+    WHERE o.device_id = ?
+    ORDER BY o.obj_type, o.obj_inst
+"""
+# One column list for every sqlite3 sample query; numeric values are rendered from value_num
+SAMPLE_COLUMNS_SQL = f"ts_utc, device_id, obj_type, obj_inst, property, {SAMPLE_VALUE_SQL}, quality, msg"
+DEVICE_SAMPLES_SQL = f"""
+    SELECT {SAMPLE_COLUMNS_SQL}
+    FROM samples
+    WHERE device_id = ?
+    ORDER BY ts_utc DESC
+    LIMIT 100
+"""
+DEVICE_SAMPLES_ALL_SQL = f"""
+    SELECT {SAMPLE_COLUMNS_SQL}
+    FROM samples
+    WHERE device_id = ?
+    ORDER BY ts_utc DESC
+"""
+SAMPLES_ALL_SQL = f"""
+    SELECT {SAMPLE_COLUMNS_SQL}
+    FROM samples
+    ORDER BY ts_utc DESC
+"""
+# ?ordered=0: plain table scan in insertion order; skips the index walk and
+# per-row table lookups of the sorted export (sort order is then best-effort)
+SAMPLES_ALL_UNORDERED_SQL = f"""
+    SELECT {SAMPLE_COLUMNS_SQL}
+    FROM samples
+"""
+
+
+def _samples_all_sql() -> str:
+    ordered = request.args.get("ordered", "1").strip().lower()
+    return SAMPLES_ALL_UNORDERED_SQL if ordered in ("0", "false", "no", "off") else SAMPLES_ALL_SQL
+
+
+# Newest rowid + newest timestamp identify the table's contents. Separate subqueries
+# keep both lookups on SQLite's O(log n) min/max path (COUNT(*) would scan the table).
+SAMPLES_VERSION_SQL = "SELECT (SELECT MAX(rowid) FROM samples), (SELECT MAX(ts_utc) FROM samples)"
+
+
+def conditional_samples_export(resp: Response, fmt: str) -> Response:
+    """
+    Tag a whole-table sample export with an ETag and turn it into a 304 when the client
+    already has this version; the body generator is then never run.
+
+    Assumes samples is append-only (nothing here deletes rows): deleting or pruning rows
+    below the newest rowid would not change the tag. No Last-Modified: the DB file's
+    mtime has one-second resolution and WAL writes may not touch it, so
+    If-Modified-Since could return a stale 304.
+    """
+    with db_conn() as con:
+        last_rowid, last_ts = con.execute(SAMPLES_VERSION_SQL).fetchone()
+    ordered = "sorted" if _samples_all_sql() is SAMPLES_ALL_SQL else "unordered"
+    encoding = resp.headers.get("Content-Encoding", "identity")
+    resp.set_etag(f"samples-{last_rowid or 0}-{last_ts or ''}-{fmt}-{ordered}-{encoding}")
+    return resp.make_conditional(request)
+
+
+# Rows of SAMPLES_ALL_UNORDERED_SQL, read by DuckDB's SQLite scanner straight into Arrow;
+# value_num is rendered in Python by _duckdb_sample_batch() (SAMPLE_VALUE_SQL is a sqlite3 UDF).
+# Unordered only: an ORDER BY here sorts the whole table before the first batch,
+# where sqlite3 streams the sorted export straight off idx_samples_ts.
+SAMPLES_ALL_DUCKDB_SQL = """
+    SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, value_num, quality, msg
+    FROM sqlite_scan(?, 'samples')
+"""
+# Set once duckdb's sqlite extension fails to load; it won't appear until a restart
+_DUCKDB_UNAVAILABLE = duckdb is None
+
+
+def _duckdb_connect():
+    """DuckDB connection with the sqlite extension loaded, or None (cached after the first failure)."""
+    global _DUCKDB_UNAVAILABLE
+    if _DUCKDB_UNAVAILABLE:
+        return None
+    con = None
+    try:
+        con = duckdb.connect()
+        # Only LOAD: a gateway may be offline, so it has to be installed ahead of time (INSTALL sqlite)
+        con.execute("LOAD sqlite")
+        return con
+    except duckdb.Error as e:
+        if con is not None:
+            con.close()
+        _DUCKDB_UNAVAILABLE = True
+        app.logger.warning("DuckDB sqlite extension unavailable, Arrow exports use sqlite3: %s", e)
+        return None
+
+
+def _duckdb_sample_batch(batch):
+    """
+    SAMPLES_ARROW_SCHEMA batch from a SAMPLES_ALL_DUCKDB_SQL batch: value_num rendered into
+    value_raw as SAMPLE_VALUE_SQL does, columns cast to the schema (DuckDB may pick narrower integers).
+    """
+    value = batch.column("value_raw")
+    num = batch.column("value_num")
+    if num.null_count < len(num):
+        value = pa.array([number_text(n) if v is None else v for v, n in zip(value.to_pylist(), num.to_pylist())],
+                         type=pa.string())
+    cols = [value if k == "value_raw" else batch.column(k) for k in SAMPLE_KEYS]
+    schema = SAMPLES_ARROW_SCHEMA
+    return pa.RecordBatch.from_arrays([c if c.type == f.type else c.cast(f.type) for c, f in zip(cols, schema)],
+                                      schema=schema)
+
+
+def _duckdb_sample_batches():
+    """
+    SAMPLES_ARROW_SCHEMA batches of all samples in table order via DuckDB, or None when
+    DuckDB can't serve them; the first batch is read up front so sqlite3 can take over.
+    """
+    con = _duckdb_connect()
+    if con is None:
+        return None
+    try:
+        reader = con.execute(SAMPLES_ALL_DUCKDB_SQL, [str(Path(get_db_path()).resolve())]).fetch_record_batch(ARROW_BATCH_ROWS)
+        try:
+            first = _duckdb_sample_batch(reader.read_next_batch())
+        except StopIteration:
+            first = None
+    except (duckdb.Error, pa.ArrowException) as e:
+        con.close()
+        app.logger.warning("DuckDB sample scan failed, using sqlite3: %s", e)
+        return None
+
+    def batches():
+        with closing(con):
+            if first is None:
+                return
+            yield first
+            for batch in reader:
+                yield _duckdb_sample_batch(batch)
+    return batches()
 
 
 @app.route("/")
@@ -239,7 +1033,6 @@ def index():
 
 @app.post("/start")
 def start():
-    global _RUN_THREAD
     with _RUN_LOCK:
         if RUN_STATE.get("status") == "running":
             return redirect(url_for("index"))
@@ -254,65 +1047,97 @@ def start():
 
 @app.get("/status.json")
 def status_json():
-    # Return a shallow-copied snapshot to avoid mid-read mutation
-    with _RUN_LOCK:
-        state = {}
-        for k, v in RUN_STATE.items():
-            if isinstance(v, dict):
-                state[k] = dict(v)
-            elif isinstance(v, list):
-                state[k] = list(v)
-            else:
-                state[k] = v
+    # Cached snapshot is shared between requests; copy the top level before adding to it
+    state = dict(_run_snapshot())
     state["process_memory"] = _process_memory()
-    return jsonify(state)
+    return json_response(state)
+
+
+# /events: seconds between keep-alive comments, and minimum gap between pushes (coalesces bursts)
+SSE_KEEPALIVE_SEC = 15.0
+SSE_MIN_INTERVAL = 0.25
+# Each open stream occupies a server thread: cap them, and end each one after a while so
+# abandoned tabs free their slot (EventSource reconnects on its own after SSE_RETRY_MS)
+SSE_MAX_CLIENTS = 4
+SSE_MAX_STREAM_SEC = 45.0
+SSE_RETRY_MS = 1000
+_SSE_SLOTS = threading.BoundedSemaphore(SSE_MAX_CLIENTS)
+
+
+def _events_since(events: list, last) -> tuple[list, bool]:
+    """Events appended after `last` (matched by identity); (all, True) if it was evicted or reset."""
+    if last is None:
+        return events, False
+    for i in range(len(events) - 1, -1, -1):
+        if events[i] is last:
+            return events[i + 1:], False
+    return events, True
+
+
+@app.get("/events")
+def events_stream():
+    """Server-sent events: one full "init" state, then "delta" messages with changed keys and new events."""
+    if not _SSE_SLOTS.acquire(blocking=False):
+        # Over the cap: the dashboard falls back to polling /status.json
+        return Response("too many event streams\n", status=503, mimetype="text/plain",
+                        headers={"Retry-After": str(int(SSE_MAX_STREAM_SEC))})
+
+    def generate():
+        seen = _RUN_VERSION
+        sent = _run_snapshot()
+        mem = _process_memory()
+        yield f"retry: {SSE_RETRY_MS}\n" + _sse({"type": "init", "state": dict(sent, process_memory=mem)})
+        last_ev = sent["events"][-1] if sent["events"] else None
+        deadline = time.monotonic() + SSE_MAX_STREAM_SEC
+        while (left := deadline - time.monotonic()) > 0:
+            with _RUN_CHANGED:
+                changed = _RUN_CHANGED.wait_for(lambda: _RUN_VERSION != seen, min(SSE_KEEPALIVE_SEC, left))
+            if not changed:
+                yield ": keepalive\n\n"
+                continue
+            time.sleep(SSE_MIN_INTERVAL)
+            seen = _RUN_VERSION
+            snap = _run_snapshot()
+            delta = {k: v for k, v in snap.items() if k != "events" and v != sent.get(k)}
+            new_events, reset = _events_since(snap["events"], last_ev)
+            mem_now = _process_memory()
+            if mem_now != mem:
+                delta["process_memory"] = mem = mem_now
+            if delta or new_events or reset:
+                yield _sse({"type": "delta", "state": delta, "events": new_events, "reset_events": reset})
+            sent = snap
+            last_ev = snap["events"][-1] if snap["events"] else None
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    resp = Response(generate(), mimetype="text/event-stream", headers=headers)
+    # close() is called by the server whether or not the stream was ever iterated
+    resp.call_on_close(_SSE_SLOTS.release)
+    return resp
 
 
 @app.get("/poll/status.json")
 def poll_status_json():
-    with _POLL_LOCK:
-        st = {}
-        for k, v in POLL_STATE.items():
-            if isinstance(v, dict):
-                st[k] = dict(v)
-            elif isinstance(v, list):
-                st[k] = list(v)
-            else:
-                st[k] = v
-    return jsonify(st)
+    return json_response(_poll_snapshot())
 
 
 @app.post("/stop")
 def stop():
-    global _RUN_THREAD
     with _RUN_LOCK:
         if RUN_STATE.get("status") in ("running", "stopping"):
-            RUN_STATE["cancel"] = True
-        th = _RUN_THREAD
+            _request_cancel()
+        fut = _RUN_FUTURE
     # Best-effort wait for shutdown to release sockets
-    if th and th.is_alive():
-        for _ in range(20):
-            th.join(timeout=0.15)
-            if not th.is_alive():
-                break
+    _wait_run(fut, 3.0)
     return redirect(url_for("index"))
 
 
 @app.post("/restart")
 def restart():
-    global _RUN_THREAD
     with _RUN_LOCK:
         # Request cancel if running
         if RUN_STATE.get("status") in ("running", "stopping"):
-            RUN_STATE["cancel"] = True
-        # Best-effort short wait for thread to end
-        th = _RUN_THREAD
-        if th and th.is_alive():
-            # Wait up to ~5 seconds without blocking server too long
-            for _ in range(25):
-                th.join(timeout=0.2)
-                if not th.is_alive():
-                    break
+            _request_cancel()
+        # Best-effort short wait (up to ~5 seconds) for the run to end
+        _wait_run(_RUN_FUTURE, 5.0)
         opts = RUN_STATE.get("last_options", {})
         _start_discovery(opts.get("local"), opts.get("port"), float(opts.get("sleep") or 0.1), bool(opts.get("snapshot")))
     return redirect(url_for("index"))
@@ -325,6 +1150,7 @@ def poll_upload():
     if not f or not f.filename:
         with _POLL_LOCK:
             POLL_STATE["last_error"] = "No file uploaded"
+            _poll_changed()
         return redirect(url_for("index"))
     # Derive project name if missing from filename stem
     if not project:
@@ -338,11 +1164,15 @@ def poll_upload():
     data_dir = Path("data")
     data_dir.mkdir(parents=True, exist_ok=True)
     out_path = data_dir / f"extraction_map_{project}.csv"
-    f.save(str(out_path))
+    # Stream the upload to disk in 64 KB chunks
+    with open(out_path, "wb") as dst:
+        shutil.copyfileobj(f.stream, dst, 65536)
+    _MAP_FILES_CACHE["key"] = None
     with _POLL_LOCK:
         POLL_STATE["project"] = project
         POLL_STATE["map_path"] = str(out_path)
         POLL_STATE["last_error"] = None
+        _poll_changed()
     return redirect(url_for("index"))
 
 
@@ -374,6 +1204,7 @@ def poll_start():
         with _POLL_LOCK:
             POLL_STATE["last_error"] = "No extraction map found. Upload one first."
             POLL_STATE["status"] = "idle"
+            _poll_changed()
         return redirect(url_for("index"))
 
     with _POLL_LOCK:
@@ -382,23 +1213,24 @@ def poll_start():
             "project": project,
             "map_path": map_path,
         })
+        _poll_changed()
     _start_poller(map_path, interval, local_if, port)
     return redirect(url_for("index"))
 
 
 @app.post("/poll/stop")
 def poll_stop():
-    global _POLL_THREAD
     with _POLL_LOCK:
         if POLL_STATE.get("status") in ("running", "stopping"):
             POLL_STATE["cancel"] = True
             POLL_STATE["status"] = "stopping"
-        th = _POLL_THREAD
-    if th and th.is_alive():
-        for _ in range(20):
-            th.join(timeout=0.15)
-            if not th.is_alive():
-                break
+            _poll_changed()
+            trip = _POLL_TRIP
+            if trip:
+                trip()
+        done = _POLL_DONE
+    # Wakes as soon as the poller run finishes (up to ~3 seconds)
+    done.wait(3.0)
     return redirect(url_for("index"))
 
 
@@ -411,7 +1243,7 @@ def reset():
         RUN_STATE.update({
             "status": "idle",
             "error": None,
-            "events": [],
+            "events": deque(maxlen=EVENTS_MAX),
             "completed": 0,
             "total_devices": 0,
             "device_stats": {},
@@ -419,31 +1251,26 @@ def reset():
             "finished_at": None,
             "cancel": False,
         })
+        _run_changed()
     return redirect(url_for("index"))
 
 
 @app.post("/hard-refresh")
 def hard_refresh():
     """Cancel any running discovery, wait briefly for shutdown, and reset state to idle."""
-    global _RUN_THREAD
     with _RUN_LOCK:
         # Request cancel if running
         if RUN_STATE.get("status") in ("running", "stopping"):
-            RUN_STATE["cancel"] = True
-        th = _RUN_THREAD
-    # Wait outside lock to avoid blocking other routes
-    if th and th.is_alive():
-        # Wait up to 5 seconds total
-        for _ in range(25):
-            th.join(timeout=0.2)
-            if not th.is_alive():
-                break
+            _request_cancel()
+        fut = _RUN_FUTURE
+    # Wait outside lock (up to 5 seconds) to avoid blocking other routes
+    _wait_run(fut, 5.0)
     # Reset state to idle (preserve last_options)
     with _RUN_LOCK:
         RUN_STATE.update({
             "status": "idle",
             "error": None,
-            "events": [],
+            "events": deque(maxlen=EVENTS_MAX),
             "completed": 0,
             "total_devices": 0,
             "device_stats": {},
@@ -453,514 +1280,202 @@ def hard_refresh():
             # Also clear any remembered form inputs so the form is blank
             "last_options": {"local": None, "port": None, "sleep": None, "snapshot": False},
         })
+        _run_changed()
     return redirect(url_for("index"))
 
 
 @app.get("/devices")
 def devices():
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute("SELECT device_id, address, vendor_name, model_name, last_seen_utc FROM devices ORDER BY device_id")
-    rows = cur.fetchall()
-    con.close()
-    devices = [
-        {"device_id": r[0], "address": r[1], "vendor_name": r[2], "model_name": r[3], "last_seen_utc": r[4]}
-        for r in rows
-    ]
+    with db_conn() as con:
+        rows = con.execute(DEVICE_LIST_SQL).fetchall()
+    devices = [dict(zip(DEVICE_LIST_KEYS, r)) for r in rows]
     return render_template("devices.html", devices=devices)
 
 
+# (RUN_STATE version, script root) -> rendered /logs page
+_LOGS_HTML_CACHE = (None, b"")
+
+
 @app.get("/logs")
 def logs():
-    return render_template("logs.html", events=list(reversed(RUN_STATE.get("events", [])))[:500])
+    global _LOGS_HTML_CACHE
+    # Re-render only when events (or other run state) changed since the last hit
+    key = (_RUN_VERSION, request.script_root)
+    cached_key, html = _LOGS_HTML_CACHE
+    if cached_key != key:
+        html = render_template("logs.html", events=list(reversed(_run_snapshot()["events"]))).encode("utf-8")
+        _LOGS_HTML_CACHE = (key, html)
+    return Response(html, mimetype="text/html")
 
 
 @app.get("/devices/<int:device_id>")
 def device_detail(device_id: int):
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute("SELECT device_id, address, vendor_name, model_name, last_seen_utc FROM devices WHERE device_id=?", (device_id,))
-    dev = cur.fetchone()
-    cur.execute("SELECT obj_type, obj_inst, obj_name FROM objects WHERE device_id=? ORDER BY obj_type, obj_inst", (device_id,))
-    objs = cur.fetchall()
-    cur.execute(
-        """
-        SELECT obj_type, obj_inst, property, value_raw, ts_utc
-        FROM samples WHERE device_id=? ORDER BY ts_utc DESC LIMIT 100
-        """,
-        (device_id,)
-    )
-    samples = cur.fetchall()
-    con.close()
+    with db_conn() as con, closing(con.cursor()) as cur:
+        cur.execute(DEVICE_DETAIL_SQL, (device_id,))
+        dev = cur.fetchone()
+        cur.execute(DEVICE_DETAIL_OBJECTS_SQL, (device_id,))
+        objs = cur.fetchall()
+        cur.execute(DEVICE_DETAIL_SAMPLES_SQL, (device_id,))
+        samples = cur.fetchall()
     return render_template("device_detail.html", device=dev, objects=objs, samples=samples)
 
 
 @app.get("/data/object-counts.json")
 def object_counts():
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT d.device_id, COALESCE(d.vendor_name,''), COALESCE(d.model_name,''), COUNT(o.id)
-        FROM devices d LEFT JOIN objects o ON d.device_id = o.device_id
-        GROUP BY d.device_id, d.vendor_name, d.model_name
-        ORDER BY d.device_id
-        """
-    )
-    rows = cur.fetchall()
-    con.close()
-    data = [{"device_id": r[0], "label": f"{r[0]} {r[1]} {r[2]}".strip(), "count": r[3] or 0} for r in rows]
-    return jsonify(data)
+    with db_conn() as con:
+        rows = con.execute(OBJECT_COUNTS_SQL).fetchall()
+    data = [{"device_id": dev, "label": f"{dev} {vendor} {model}".strip(), "count": count or 0}
+            for dev, vendor, model, count in rows]
+    return json_response(data)
 
 
 @app.get("/data/points.csv")
 def points_csv():
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT o.device_id,
-               COALESCE(d.address, ''),
-               COALESCE(d.vendor_name, ''),
-               COALESCE(d.model_name, ''),
-               o.obj_type,
-               o.obj_inst,
-               COALESCE(o.obj_name, '')
-        FROM objects o
-        LEFT JOIN devices d ON d.device_id = o.device_id
-        ORDER BY o.device_id, o.obj_type, o.obj_inst
-        """
-    )
-    def generate():
-        try:
-            buff = io.StringIO()
-            w = csv.writer(buff)
-            w.writerow(["device_id", "address", "vendor", "model", "obj_type", "obj_inst", "obj_name"])
-            yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-            for r in cur.fetchall():
-                w.writerow([r[0], r[1], r[2], r[3], r[4], r[5], r[6]])
-                yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
-    headers = {"Content-Disposition": "attachment; filename=points.csv"}
-    return Response(generate(), mimetype="text/csv", headers=headers)
+    return cached_csv_response("points.csv", POINTS_SQL, OBJECTS_CSV_HEADER)
 
 
 @app.get("/data/points.json")
 def points_json():
-    con = db_connect()
-    try:
-        cur = con.cursor()
-        cur.execute(
-            """
-            SELECT o.device_id,
-                   COALESCE(d.address, ''),
-                   COALESCE(d.vendor_name, ''),
-                   COALESCE(d.model_name, ''),
-                   o.obj_type,
-                   o.obj_inst,
-                   COALESCE(o.obj_name, '')
-            FROM objects o
-            LEFT JOIN devices d ON d.device_id = o.device_id
-            ORDER BY o.device_id, o.obj_type, o.obj_inst
-            """
-        )
+    with db_conn() as con, closing(con.cursor()) as cur:
+        cur.execute(POINTS_SQL)
         rows = cur.fetchall()
-        items = [
-            {
-                "device_id": r[0],
-                "address": r[1],
-                "vendor": r[2],
-                "model": r[3],
-                "obj_type": r[4],
-                "obj_inst": r[5],
-                "obj_name": r[6],
-            }
-            for r in rows
-        ]
-        return jsonify(items)
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+        items = [dict(zip(POINT_KEYS, r)) for r in rows]
+        return json_response(items)
 
 
 @app.get("/data/devices.csv")
 def devices_csv():
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT device_id,
-               address,
-               COALESCE(vendor_name,''),
-               COALESCE(model_name,''),
-               COALESCE(vendor_id,''),
-               COALESCE(max_apdu,''),
-               COALESCE(segmentation,''),
-               COALESCE(firmware_rev,''),
-               COALESCE(app_software,''),
-               last_seen_utc
-        FROM devices
-        ORDER BY device_id
-        """
-    )
-    def generate():
-        try:
-            buff = io.StringIO()
-            w = csv.writer(buff)
-            w.writerow([
-                "device_id","address","vendor_name","model_name","vendor_id",
-                "max_apdu","segmentation","firmware_rev","app_software","last_seen_utc"
-            ])
-            yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-            for r in cur.fetchall():
-                w.writerow([r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7], r[8], r[9]])
-                yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
-    headers = {"Content-Disposition": "attachment; filename=devices.csv"}
-    return Response(generate(), mimetype="text/csv", headers=headers)
+    return cached_csv_response("devices.csv", DEVICES_CSV_SQL, DEVICES_CSV_HEADER)
 
 
 @app.get("/data/devices.json")
 def devices_json():
-    con = db_connect()
-    try:
-        cur = con.cursor()
-        cur.execute(
-            """
-            SELECT device_id,
-                   address,
-                   vendor_name,
-                   model_name,
-                   vendor_id,
-                   max_apdu,
-                   segmentation,
-                   firmware_rev,
-                   app_software,
-                   last_seen_utc
-            FROM devices
-            ORDER BY device_id
-            """
-        )
+    with db_conn() as con, closing(con.cursor()) as cur:
+        cur.execute(DEVICES_SQL)
         rows = cur.fetchall()
-        items = [
-            {
-                "device_id": r[0],
-                "address": r[1],
-                "vendor_name": r[2],
-                "model_name": r[3],
-                "vendor_id": r[4],
-                "max_apdu": r[5],
-                "segmentation": r[6],
-                "firmware_rev": r[7],
-                "app_software": r[8],
-                "last_seen_utc": r[9],
-            }
-            for r in rows
-        ]
-        return jsonify(items)
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+        items = [dict(zip(DEVICE_KEYS, r)) for r in rows]
+        return json_response(items)
 
 
 @app.get("/data/devices/<int:device_id>/objects.csv")
 def device_objects_csv(device_id: int):
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT o.device_id,
-               COALESCE(d.address, ''),
-               COALESCE(d.vendor_name, ''),
-               COALESCE(d.model_name, ''),
-               o.obj_type,
-               o.obj_inst,
-               COALESCE(o.obj_name, '')
-        FROM objects o
-        LEFT JOIN devices d ON d.device_id = o.device_id
-        WHERE o.device_id = ?
-        ORDER BY o.obj_type, o.obj_inst
-        """,
-        (device_id,)
-    )
     def generate():
-        try:
-            buff = io.StringIO()
-            w = csv.writer(buff)
-            w.writerow(["device_id", "address", "vendor", "model", "obj_type", "obj_inst", "obj_name"])
-            yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-            for r in cur.fetchall():
-                w.writerow([r[0], r[1], r[2], r[3], r[4], r[5], r[6]])
-                yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(DEVICE_OBJECTS_SQL, (device_id,))
+            yield from _csv_chunks(cur, OBJECTS_CSV_HEADER)
     headers = {"Content-Disposition": f"attachment; filename=device_{device_id}_objects.csv"}
-    return Response(generate(), mimetype="text/csv", headers=headers)
+    return stream_response(generate(), "text/csv", headers)
 
 
 @app.get("/data/devices/<int:device_id>/objects.json")
 def device_objects_json(device_id: int):
-    con = db_connect()
-    try:
-        cur = con.cursor()
-        cur.execute(
-            """
-            SELECT o.device_id,
-                   COALESCE(d.address, ''),
-                   COALESCE(d.vendor_name, ''),
-                   COALESCE(d.model_name, ''),
-                   o.obj_type,
-                   o.obj_inst,
-                   COALESCE(o.obj_name, '')
-            FROM objects o
-            LEFT JOIN devices d ON d.device_id = o.device_id
-            WHERE o.device_id = ?
-            ORDER BY o.obj_type, o.obj_inst
-            """,
-            (device_id,)
-        )
+    with db_conn() as con, closing(con.cursor()) as cur:
+        cur.execute(DEVICE_OBJECTS_SQL, (device_id,))
         rows = cur.fetchall()
-        items = [
-            {"device_id": r[0], "address": r[1], "vendor": r[2], "model": r[3], "obj_type": r[4], "obj_inst": r[5], "obj_name": r[6]}
-            for r in rows
-        ]
-        return jsonify(items)
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+        items = [dict(zip(POINT_KEYS, r)) for r in rows]
+        return json_response(items)
 
 
 @app.get("/data/devices/<int:device_id>/samples.csv")
 def device_samples_csv(device_id: int):
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg
-        FROM samples
-        WHERE device_id = ?
-        ORDER BY ts_utc DESC
-        LIMIT 100
-        """,
-        (device_id,)
-    )
     def generate():
-        try:
-            buff = io.StringIO()
-            w = csv.writer(buff)
-            w.writerow(["ts_utc", "device_id", "obj_type", "obj_inst", "property", "value_raw", "quality", "msg"])
-            yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-            for r in cur.fetchall():
-                w.writerow([r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7]])
-                yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(DEVICE_SAMPLES_SQL, (device_id,))
+            yield from _csv_chunks(cur, SAMPLES_CSV_HEADER)
     headers = {"Content-Disposition": f"attachment; filename=device_{device_id}_samples.csv"}
-    return Response(generate(), mimetype="text/csv", headers=headers)
+    return stream_response(generate(), "text/csv", headers)
 
 
 @app.get("/data/devices/<int:device_id>/samples.json")
 def device_samples_json(device_id: int):
-    con = db_connect()
-    try:
-        cur = con.cursor()
-        cur.execute(
-            """
-            SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg
-            FROM samples
-            WHERE device_id = ?
-            ORDER BY ts_utc DESC
-            LIMIT 100
-            """,
-            (device_id,)
-        )
+    with db_conn() as con, closing(con.cursor()) as cur:
+        cur.execute(DEVICE_SAMPLES_SQL, (device_id,))
         rows = cur.fetchall()
-        items = [
-            {
-                "ts_utc": r[0],
-                "device_id": r[1],
-                "obj_type": r[2],
-                "obj_inst": r[3],
-                "property": r[4],
-                "value_raw": r[5],
-                "quality": r[6],
-                "msg": r[7],
-            }
-            for r in rows
-        ]
-        return jsonify(items)
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+        items = [dict(zip(SAMPLE_KEYS, r)) for r in rows]
+        return json_response(items)
 
 
 @app.get("/data/devices/<int:device_id>/samples-all.csv")
 def device_samples_all_csv(device_id: int):
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg
-        FROM samples
-        WHERE device_id = ?
-        ORDER BY ts_utc DESC
-        """,
-        (device_id,)
-    )
     def generate():
-        try:
-            buff = io.StringIO()
-            w = csv.writer(buff)
-            w.writerow(["ts_utc", "device_id", "obj_type", "obj_inst", "property", "value_raw", "quality", "msg"])
-            yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-            for r in cur:
-                w.writerow([r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7]])
-                yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(DEVICE_SAMPLES_ALL_SQL, (device_id,))
+            yield from _csv_chunks(cur, SAMPLES_CSV_HEADER)
     headers = {"Content-Disposition": f"attachment; filename=device_{device_id}_samples_all.csv"}
-    return Response(generate(), mimetype="text/csv", headers=headers)
+    return stream_response(generate(), "text/csv", headers)
 
 
 @app.get("/data/devices/<int:device_id>/samples-all.json")
 def device_samples_all_json(device_id: int):
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg
-        FROM samples
-        WHERE device_id = ?
-        ORDER BY ts_utc DESC
-        """,
-        (device_id,)
-    )
     def generate():
-        try:
-            first = True
-            yield "["
-            for r in cur:
-                item = {
-                    "ts_utc": r[0],
-                    "device_id": r[1],
-                    "obj_type": r[2],
-                    "obj_inst": r[3],
-                    "property": r[4],
-                    "value_raw": r[5],
-                    "quality": r[6],
-                    "msg": r[7],
-                }
-                if not first:
-                    yield ","
-                first = False
-                yield json.dumps(item)
-            yield "]"
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(DEVICE_SAMPLES_ALL_SQL, (device_id,))
+            yield from _json_array_chunks(cur, _encode_sample_rows)
     headers = {"Content-Disposition": f"attachment; filename=device_{device_id}_samples_all.json"}
-    return Response(generate(), mimetype="application/json", headers=headers)
+    return stream_response(generate(), "application/json", headers)
 
 
 @app.get("/data/samples-all.csv")
 def samples_all_csv():
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg
-        FROM samples
-        ORDER BY ts_utc DESC
-        """
-    )
-    def generate():
-        try:
-            buff = io.StringIO()
-            w = csv.writer(buff)
-            w.writerow(["ts_utc", "device_id", "obj_type", "obj_inst", "property", "value_raw", "quality", "msg"])
-            yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-            for r in cur:
-                w.writerow([r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7]])
-                yield buff.getvalue(); buff.seek(0); buff.truncate(0)
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
-    headers = {"Content-Disposition": "attachment; filename=samples_all.csv"}
-    return Response(generate(), mimetype="text/csv", headers=headers)
+    sql = _samples_all_sql()
+    name = "samples_all.csv" if sql is SAMPLES_ALL_SQL else "samples_all_unordered.csv"
+    return cached_csv_response(name, sql, SAMPLES_CSV_HEADER)
 
 
 @app.get("/data/samples-all.json")
 def samples_all_json():
-    con = db_connect()
-    cur = con.cursor()
-    cur.execute(
-        """
-        SELECT ts_utc, device_id, obj_type, obj_inst, property, value_raw, quality, msg
-        FROM samples
-        ORDER BY ts_utc DESC
-        """
-    )
+    sql = _samples_all_sql()
+
     def generate():
-        try:
-            first = True
-            yield "["
-            for r in cur:
-                item = {
-                    "ts_utc": r[0],
-                    "device_id": r[1],
-                    "obj_type": r[2],
-                    "obj_inst": r[3],
-                    "property": r[4],
-                    "value_raw": r[5],
-                    "quality": r[6],
-                    "msg": r[7],
-                }
-                if not first:
-                    yield ","
-                first = False
-                yield json.dumps(item)
-            yield "]"
-        finally:
-            try:
-                con.close()
-            except Exception:
-                pass
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(sql)
+            yield from _json_array_chunks(cur, _encode_sample_rows)
     headers = {"Content-Disposition": "attachment; filename=samples_all.json"}
-    return Response(generate(), mimetype="application/json", headers=headers)
+    return conditional_samples_export(stream_response(generate(), "application/json", headers), "json")
+
+
+@app.get("/data/samples-all.ndjson")
+def samples_all_ndjson():
+    sql = _samples_all_sql()
+
+    def generate():
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(sql)
+            yield from _ndjson_chunks(cur, _encode_sample_lines)
+    headers = {"Content-Disposition": "attachment; filename=samples_all.ndjson"}
+    return conditional_samples_export(stream_response(generate(), "application/x-ndjson", headers), "ndjson")
+
+
+@app.get("/data/samples-all.arrow")
+def samples_all_arrow():
+    if pa is None:
+        return Response("pyarrow is not installed\n", status=501, mimetype="text/plain")
+    sql = _samples_all_sql()
+
+    def generate():
+        batches = _duckdb_sample_batches() if sql is SAMPLES_ALL_UNORDERED_SQL else None
+        if batches is not None:
+            # Columnar end to end: rows never become Python objects
+            yield from _arrow_chunks(batches, SAMPLES_ARROW_SCHEMA)
+            return
+        with db_conn() as con, closing(con.cursor()) as cur:
+            cur.execute(sql)
+            yield from _arrow_chunks(_sqlite_record_batches(cur, SAMPLES_ARROW_SCHEMA), SAMPLES_ARROW_SCHEMA)
+    headers = {"Content-Disposition": "attachment; filename=samples_all.arrow"}
+    resp = Response(_prefetched(generate()), mimetype="application/vnd.apache.arrow.stream", headers=headers)
+    return conditional_samples_export(resp, "arrow")
+
+
+FLASK_DEBUG = str(os.getenv("FLASK_DEBUG", "")).strip().lower() in ("1", "true", "yes", "on")
 
 
 def run(host="127.0.0.1", port=8000):
-    dbg = str(os.getenv("FLASK_DEBUG", "")).strip().lower() in ("1", "true", "yes", "on")
-    app.run(host=host, port=port, debug=dbg)
+    if waitress_serve is not None and not FLASK_DEBUG:
+        waitress_serve(app, host=host, port=port, threads=WEB_THREADS + SSE_MAX_CLIENTS)
+        return
+    # Dev server fallback; threaded=True is Flask's default, kept explicit because slow exports
+    # and status polls rely on a thread per request
+    app.run(host=host, port=port, debug=FLASK_DEBUG, threaded=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+pa_ipc = pytest.importorskip("pyarrow.ipc")
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def webapp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "data" / "samples.db"))
+    from bacnet_extractor import discover, webapp
+    from bacnet_extractor.db import ensure_db
+
+    try:
+        duckdb.connect().execute("LOAD sqlite")
+    except duckdb.Error:
+        pytest.skip("duckdb sqlite extension is not installed")
+
+    con = ensure_db()
+    values = [72.5, 3, 72.0, "active", None, 1e16, -0.125, True, "inactive", 2 ** 60]
+    rows = [
+        discover.sample_row(f"2026-01-01T00:00:{i % 7:02d}", 100 + i % 3, "analogInput", i, "presentValue",
+                            values[i % len(values)], quality="poll" if i % 4 else None, msg="")
+        for i in range(3000)
+    ]
+    con.execute("BEGIN")
+    con.executemany(discover.INSERT_SAMPLE_SQL, rows)
+    con.execute("COMMIT")
+    con.close()
+    monkeypatch.setattr(webapp, "_DUCKDB_UNAVAILABLE", False)
+    return webapp
+
+
+def _export(webapp):
+    body = webapp.app.test_client().get("/data/samples-all.arrow?ordered=0").get_data()
+    return pa_ipc.open_stream(body).read_all()
+
+
+def test_duckdb_export_matches_sqlite3(webapp, monkeypatch):
+    served = []
+    duckdb_batches = webapp._duckdb_sample_batches
+
+    def spy():
+        batches = duckdb_batches()
+        served.append(batches is not None)
+        return batches
+    monkeypatch.setattr(webapp, "_duckdb_sample_batches", spy)
+    via_duckdb = _export(webapp)
+    assert served == [True]
+    monkeypatch.setattr(webapp, "_DUCKDB_UNAVAILABLE", True)
+    via_sqlite = _export(webapp)
+    assert via_duckdb.schema.equals(webapp.SAMPLES_ARROW_SCHEMA)
+    assert via_duckdb.num_rows == 3000
+    assert via_duckdb.equals(via_sqlite)